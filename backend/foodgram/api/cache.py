@@ -0,0 +1,103 @@
+import time
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+
+from recipes.models import Favorite, Follow, ShoppingCart
+
+INGREDIENTS_VERSION_KEY = 'ingredients_version'
+TAGS_VERSION_KEY = 'tags_version'
+RECIPES_VERSION_KEY = 'recipes_version'
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, None)
+        return cache.get(key)
+    return version
+
+
+def bump_version(key):
+    cache.set(key, uuid4().hex, None)
+
+
+USER_FLAGS_VERSION_KEY = 'user_flags_version:{user}'
+USER_FLAGS_KEY = 'user_flags:{user}:{version}'
+USER_FLAGS_TIMEOUT = 60 * 60
+
+
+def load_user_flags(user_id):
+    return {
+        'favorites': frozenset(Favorite.objects.filter(
+            user=user_id
+        ).values_list('recipe', flat=True)),
+        'shopping_cart': frozenset(ShoppingCart.objects.filter(
+            user=user_id
+        ).values_list('recipe', flat=True)),
+        'follows': frozenset(Follow.objects.filter(
+            follower=user_id
+        ).values_list('author', flat=True)),
+    }
+
+
+def get_user_flags(user_id):
+    """Множества id избранного, корзины и подписок пользователя."""
+    key = USER_FLAGS_KEY.format(
+        user=user_id,
+        version=get_version(USER_FLAGS_VERSION_KEY.format(user=user_id))
+    )
+    flags = cache.get(key)
+    if flags is None:
+        flags = load_user_flags(user_id)
+        cache.set(key, flags, USER_FLAGS_TIMEOUT)
+    return flags
+
+
+def invalidate_user_flags(user_id):
+    key = USER_FLAGS_VERSION_KEY.format(user=user_id)
+    bump_version(key)
+    # Повторный сброс после фиксации отбрасывает множества, которые
+    # параллельные запросы успели прочитать до нее.
+    transaction.on_commit(lambda: bump_version(key))
+
+
+def invalidate_recipes():
+    bump_version(RECIPES_VERSION_KEY)
+    transaction.on_commit(lambda: bump_version(RECIPES_VERSION_KEY))
+
+
+RESPONSE_KEY = 'response:{versions}:{digest}'
+RESPONSE_TIMEOUT = 60 * 60
+RESPONSE_LOCK_TIMEOUT = 30
+RESPONSE_LOCK_WAIT = 5
+RESPONSE_LOCK_POLL = 0.05
+
+
+def single_flight(key, compute, timeout):
+    """Значение из кэша, при промахе его считает только один запрос.
+
+    compute возвращает пару (значение, можно ли его кэшировать). Пока
+    значение считается, остальные запросы ждут его появления в кэше и,
+    не дождавшись за RESPONSE_LOCK_WAIT секунд, считают его сами.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+    lock_key = f'{key}:lock'
+    deadline = time.monotonic() + RESPONSE_LOCK_WAIT
+    while not cache.add(lock_key, 1, RESPONSE_LOCK_TIMEOUT):
+        time.sleep(RESPONSE_LOCK_POLL)
+        value = cache.get(key)
+        if value is not None:
+            return value
+        if time.monotonic() > deadline:
+            return compute()[0]
+    try:
+        value, cacheable = compute()
+        if cacheable:
+            cache.set(key, value, timeout)
+    finally:
+        cache.delete(lock_key)
+    return value
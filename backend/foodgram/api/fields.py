@@ -0,0 +1,60 @@
+import uuid
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from drf_extra_fields.fields import Base64ImageField
+from PIL import Image
+from rest_framework import serializers
+
+from recipes.models import ImageUpload
+
+IMAGE_EXTENSIONS = {
+    'JPEG': 'jpg',
+    'PNG': 'png',
+    'GIF': 'gif',
+    'WEBP': 'webp',
+}
+
+
+def validate_image_header(file):
+    """Проверяет картинку по заголовку, не декодируя пиксели."""
+    if file.size > settings.RECIPE_IMAGE_MAX_SIZE:
+        raise serializers.ValidationError('Файл слишком большой')
+    try:
+        with Image.open(file) as image:
+            image_format, (width, height) = image.format, image.size
+    except (OSError, Image.DecompressionBombError):
+        raise serializers.ValidationError(
+            'Загрузите корректное изображение'
+        )
+    finally:
+        file.seek(0)
+    if image_format not in IMAGE_EXTENSIONS:
+        raise serializers.ValidationError('Неподдерживаемый формат картинки')
+    if width * height > settings.RECIPE_IMAGE_MAX_PIXELS:
+        raise serializers.ValidationError('Слишком большое разрешение')
+    file.name = f'{uuid.uuid4()}.{IMAGE_EXTENSIONS[image_format]}'
+    return file
+
+
+class RecipeImageField(Base64ImageField):
+    """Картинка строкой base64, файлом multipart или токеном загрузки."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, UploadedFile):
+            return validate_image_header(data)
+        if isinstance(data, str) and ';base64,' not in data:
+            try:
+                token = uuid.UUID(data)
+            except ValueError:
+                token = None
+            if token is not None:
+                upload = ImageUpload.objects.filter(
+                    token=token, user=self.context['request'].user
+                ).first()
+                if upload is None:
+                    raise serializers.ValidationError(
+                        'Загруженная картинка не найдена'
+                    )
+                return upload
+        return super().to_internal_value(data)
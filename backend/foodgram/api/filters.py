@@ -1,7 +1,7 @@
 from django_filters.rest_framework import FilterSet, filters
-from rest_framework.filters import SearchFilter
 
 from recipes.models import Recipe, Tag
+from recipes.search import get_search_backend
 
 
 class RecipeFilter(FilterSet):
@@ -16,6 +16,9 @@ class RecipeFilter(FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method='get_is_in_shopping_cart'
     )
+    search = filters.CharFilter(
+        method='get_search'
+    )
 
     def get_is_favorited(self, queryset, name, value):
         if value:
@@ -31,10 +34,13 @@ class RecipeFilter(FilterSet):
             )
         return queryset
 
+    def get_search(self, queryset, name, value):
+        if value:
+            return get_search_backend().search(queryset, value)
+        return queryset
+
     class Meta:
         model = Recipe
-        fields = ('tags', 'author', 'is_favorited', 'is_in_shopping_cart')
-
-
-class IngredientFilter(SearchFilter):
-    search_param = 'name'
+        fields = (
+            'tags', 'author', 'is_favorited', 'is_in_shopping_cart', 'search'
+        )
@@ -0,0 +1,56 @@
+from bisect import bisect_left
+from threading import Lock
+
+from recipes.models import Ingredient
+
+from .cache import INGREDIENTS_VERSION_KEY, get_version
+
+
+def normalize(value):
+    return value.casefold().replace('ё', 'е').strip()
+
+
+class IngredientIndex:
+    def __init__(self):
+        self._lock = Lock()
+        self._data = (None, [], [])
+
+    def _get_data(self):
+        version = get_version(INGREDIENTS_VERSION_KEY)
+        if self._data[0] == version:
+            return self._data
+        with self._lock:
+            if self._data[0] != version:
+                rows = sorted(
+                    (normalize(name), name, ingredient_id, unit)
+                    for ingredient_id, name, unit
+                    in Ingredient.objects.values_list(
+                        'id', 'name', 'measurement_unit'
+                    )
+                )
+                self._data = (
+                    version,
+                    [row[0] for row in rows],
+                    [
+                        {'id': ingredient_id,
+                         'name': name,
+                         'measurement_unit': unit}
+                        for _, name, ingredient_id, unit in rows
+                    ]
+                )
+        return self._data
+
+    def search(self, query):
+        _, keys, items = self._get_data()
+        query = normalize(query)
+        start = bisect_left(keys, query)
+        end = start
+        while end < len(keys) and keys[end].startswith(query):
+            end += 1
+        return items[start:end] + [
+            item for key, item in zip(keys, items)
+            if query in key and not key.startswith(query)
+        ]
+
+
+ingredient_index = IngredientIndex()
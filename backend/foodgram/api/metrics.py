@@ -0,0 +1,107 @@
+from bisect import bisect_left
+from collections import defaultdict
+from threading import Lock
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+QUERIES_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def lines(self, name, labels):
+        total = 0
+        for bound, count in zip(
+            (*map(str, self.buckets), '+Inf'), self.counts
+        ):
+            total += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {total}'
+        yield f'{name}_sum{{{labels}}} {self.sum}'
+        yield f'{name}_count{{{labels}}} {total}'
+
+
+def format_labels(**labels):
+    return ','.join(
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace(
+            '"', '\\"'
+        ).replace('\n', '\\n'))
+        for key, value in labels.items()
+    )
+
+
+class MetricsRegistry:
+    """Гистограммы по маршрутам в памяти процесса."""
+
+    histograms = (
+        ('foodgram_request_duration_seconds', DURATION_BUCKETS,
+         'Request wall time'),
+        ('foodgram_request_db_seconds', DURATION_BUCKETS,
+         'SQL time per request'),
+        ('foodgram_request_serialize_seconds', DURATION_BUCKETS,
+         'Serializer and Reader time per request, without SQL'),
+        ('foodgram_request_db_queries', QUERIES_BUCKETS,
+         'SQL queries per request'),
+        ('foodgram_response_size_bytes', SIZE_BUCKETS,
+         'Response body size'),
+    )
+
+    def __init__(self):
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._requests = defaultdict(int)
+            self._histograms = {
+                name: defaultdict(lambda buckets=buckets: Histogram(buckets))
+                for name, buckets, _ in self.histograms
+            }
+
+    def observe(self, route, method, status, duration, db_time, ser_time,
+                queries, size):
+        labels = format_labels(route=route, method=method)
+        with self._lock:
+            self._requests[
+                format_labels(route=route, method=method, status=status)
+            ] += 1
+            for name, value in zip(
+                (name for name, _, _ in self.histograms),
+                (duration, db_time, ser_time, queries, size)
+            ):
+                if value is not None:
+                    self._histograms[name][labels].observe(value)
+
+    def render(self):
+        """Метрики в текстовом формате Prometheus."""
+        with self._lock:
+            lines = [
+                '# HELP foodgram_requests_total Requests served',
+                '# TYPE foodgram_requests_total counter',
+            ]
+            lines += [
+                f'foodgram_requests_total{{{labels}}} {count}'
+                for labels, count in sorted(self._requests.items())
+            ]
+            for name, _, description in self.histograms:
+                lines += [
+                    f'# HELP {name} {description}',
+                    f'# TYPE {name} histogram',
+                ]
+                for labels, histogram in sorted(
+                    self._histograms[name].items()
+                ):
+                    lines += histogram.lines(name, labels)
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
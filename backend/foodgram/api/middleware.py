@@ -0,0 +1,227 @@
+import heapq
+import json
+import logging
+import random
+from contextlib import contextmanager
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from .metrics import metrics
+from .profiling import PROFILERS, SQLRecorder, create_profiler, save_profile
+
+logger = logging.getLogger(__name__)
+
+SQL_LOG_LENGTH = 1000
+
+
+def route_name(view_func, method):
+    """Имя маршрута для метрик: класс представления и действие вьюсета."""
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return getattr(view_func, '__name__', 'unknown')
+    action = (getattr(view_func, 'actions', None) or {}).get(method.lower())
+    if action is None:
+        return view_class.__name__
+    return f'{view_class.__name__}.{action}'
+
+
+class RequestStats:
+    """Время и SQL-запросы одного HTTP-запроса."""
+
+    def __init__(self, top_queries):
+        self.start = perf_counter()
+        self.route = 'unresolved'
+        self.queries = 0
+        self.db_time = 0
+        self.ser_time = 0
+        self.top_queries = top_queries
+        self.slow_queries = []
+        self.view_end = self.encode_end = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = perf_counter() - start
+            self.queries += 1
+            self.db_time += duration
+            item = (duration, self.queries, sql)
+            if len(self.slow_queries) < self.top_queries:
+                heapq.heappush(self.slow_queries, item)
+            elif self.slow_queries:
+                heapq.heappushpop(self.slow_queries, item)
+
+    @contextmanager
+    def serializing(self):
+        """Относит время блока без выполненного в нем SQL к фазе ser."""
+        start, db_time = perf_counter(), self.db_time
+        try:
+            yield
+        finally:
+            self.ser_time += (
+                perf_counter() - start - (self.db_time - db_time)
+            )
+
+    def encoded(self, response):
+        self.encode_end = perf_counter()
+
+    def phases(self, total):
+        view_end = self.view_end or self.start + total
+        encode = (self.encode_end or view_end) - view_end
+        return {
+            'db': self.db_time,
+            'app': max(
+                view_end - self.start - self.db_time - self.ser_time, 0
+            ),
+            'ser': self.ser_time,
+            'encode': encode,
+            'total': total,
+        }
+
+    def server_timing(self, total):
+        timing = []
+        for name, duration in self.phases(total).items():
+            entry = f'{name};dur={duration * 1000:.1f}'
+            if name == 'db':
+                entry += f';desc="{self.queries} queries"'
+            timing.append(entry)
+        return ', '.join(timing)
+
+    def top(self):
+        return [
+            {
+                'ms': round(duration * 1000, 1),
+                'sql': sql[:SQL_LOG_LENGTH],
+            }
+            for duration, _, sql in sorted(self.slow_queries, reverse=True)
+        ]
+
+
+@contextmanager
+def serializing(request):
+    """Замеряет сериализацию ответа, если запрос прошел через middleware."""
+    stats = getattr(request, 'performance', None)
+    if stats is None:
+        yield
+        return
+    with stats.serializing():
+        yield
+
+
+class PerformanceMiddleware:
+    """Замеряет запросы: заголовок Server-Timing, метрики и медленный лог.
+
+    SQL считается через connection.execute_wrapper. Сериализаторы и Reader
+    вызываются в представлениях внутри serializing() и попадают в ser, а не
+    в app; encode — работа рендерера DRF до post-render callback. Запросы
+    медленнее SLOW_REQUEST_MS пишутся в лог вместе с самыми долгими SQL.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats(settings.SLOW_REQUEST_TOP_QUERIES)
+        request.performance = stats
+        with connection.execute_wrapper(stats):
+            response = self.get_response(request)
+        total = perf_counter() - stats.start
+        size = None if response.streaming else len(response.content)
+        response['Server-Timing'] = stats.server_timing(total)
+        metrics.observe(
+            stats.route, request.method, response.status_code,
+            total, stats.db_time, stats.ser_time, stats.queries, size
+        )
+        if total * 1000 >= settings.SLOW_REQUEST_MS:
+            logger.warning(json.dumps({
+                'event': 'slow_request',
+                'route': stats.route,
+                'method': request.method,
+                'path': request.get_full_path(),
+                'status': response.status_code,
+                'size': size,
+                'queries': stats.queries,
+                'timing_ms': {
+                    name: round(duration * 1000, 1)
+                    for name, duration in stats.phases(total).items()
+                },
+                'top_queries': stats.top(),
+            }, ensure_ascii=False))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.performance.route = route_name(view_func, request.method)
+
+    def process_template_response(self, request, response):
+        request.performance.view_end = perf_counter()
+        response.add_post_render_callback(request.performance.encoded)
+        return response
+
+
+class ProfileMiddleware:
+    """Профилирует отдельные запросы к API.
+
+    Сотрудник получает вместо ответа профиль запроса, передав ?_profile=
+    или заголовок X-Profile со значением collapsed (свернутые стеки
+    сэмплирующего профилировщика, по умолчанию) или pstats (cProfile).
+    Кроме того, доля PROFILE_SAMPLE_RATE всех запросов профилируется без
+    изменения ответа. Профиль и SQL запроса сохраняются в PROFILE_DIR,
+    старые выгрузки сверх PROFILE_MAX_DUMPS удаляются.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not request.path.startswith('/api/'):
+            return self.get_response(request)
+        mode = request.GET.get('_profile') or request.META.get(
+            'HTTP_X_PROFILE'
+        )
+        if mode and self.is_staff(request):
+            mode = mode if mode in PROFILERS else 'collapsed'
+            response, content, name, queries = self.profile(request, mode)
+            _, content_type = PROFILERS[mode]
+            profile = HttpResponse(content, content_type=content_type)
+            profile['X-Profile-Dump'] = name
+            profile['X-Profile-Queries'] = queries
+            profile['X-Profile-Status'] = response.status_code
+            return profile
+        if random.random() < settings.PROFILE_SAMPLE_RATE:
+            return self.profile(request, 'collapsed', consume=False)[0]
+        return self.get_response(request)
+
+    @staticmethod
+    def is_staff(request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_staff:
+            return True
+        try:
+            user_auth = TokenAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return False
+        return user_auth is not None and user_auth[0].is_staff
+
+    def profile(self, request, mode, consume=True):
+        """Профилирует запрос до возврата ответа.
+
+        Потоковый ответ (список покупок) собирается при чтении. Если вместо
+        ответа отдается профиль, поток дочитывается под профилировщиком,
+        иначе остается нетронутым и отдается клиенту без буферизации.
+        """
+        profiler = create_profiler(mode)
+        recorder = SQLRecorder(profiler)
+        with connection.execute_wrapper(recorder), profiler:
+            response = self.get_response(request)
+            if consume and response.streaming:
+                for _ in response.streaming_content:
+                    pass
+        content = profiler.dump()
+        name = save_profile(mode, content, recorder.dump())
+        return response, content, name, len(recorder.queries)
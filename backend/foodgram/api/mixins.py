@@ -0,0 +1,92 @@
+from hashlib import sha1
+from urllib.parse import urlencode
+
+from django.http import HttpResponse
+from rest_framework.response import Response
+
+from .cache import RESPONSE_KEY, RESPONSE_TIMEOUT, get_version, single_flight
+from .middleware import serializing
+
+
+class AnonymousCacheMixin:
+    """Кэширует готовые JSON-ответы анонимным пользователям.
+
+    Для анонима ответ зависит только от адреса и параметров запроса, поэтому
+    ключ собирается из них и версий данных response_cache_versions. Схема
+    и хост входят в адрес: ссылки в ответе абсолютные. Версии сбрасываются
+    сигналами моделей, и устаревший ответ не отдается.
+    """
+    response_cache_versions = ()
+
+    def is_response_cacheable(self, request):
+        return (
+            request.user.is_anonymous
+            and request.accepted_renderer.format == 'json'
+        )
+
+    def get_response_cache_key(self, request):
+        query = urlencode(sorted(
+            (key, sorted(values))
+            for key, values in request.query_params.lists()
+        ), doseq=True)
+        return RESPONSE_KEY.format(
+            versions='-'.join(
+                get_version(key) for key in self.response_cache_versions
+            ),
+            digest=sha1(
+                f'{request.scheme}://{request.get_host()}{request.path}'
+                f'?{query}'.encode()
+            ).hexdigest()
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if not self.is_response_cacheable(request):
+            return handler(request, *args, **kwargs)
+
+        def compute():
+            response = self.finalize_response(
+                request, handler(request, *args, **kwargs), *args, **kwargs
+            )
+            response.render()
+            return (
+                (response.status_code, response.content,
+                 response['Content-Type']),
+                response.status_code == 200
+            )
+
+        status, content, content_type = single_flight(
+            self.get_response_cache_key(request), compute, RESPONSE_TIMEOUT
+        )
+        return HttpResponse(content, status=status, content_type=content_type)
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class SerializingMixin:
+    """Стандартные list и retrieve с замером сериализации в фазе ser."""
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(
+            queryset if page is None else page, many=True
+        )
+        with serializing(request):
+            data = serializer.data
+        if page is None:
+            return Response(data)
+        return self.get_paginated_response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        serializer = self.get_serializer(self.get_object())
+        with serializing(request):
+            data = serializer.data
+        return Response(data)
@@ -1,5 +1,168 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def estimate_count(queryset):
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']['Plan Rows']
 
 
 class LimitPageNumberPagination(PageNumberPagination):
     page_size_query_param = 'limit'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Неверный курсор'
+
+    def is_cursor_mode(self, request):
+        return self.cursor_query_param in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.is_cursor_mode(request)
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        self.request = request
+        self.ordering = self.get_ordering(queryset)
+        values, reverse = self.decode_cursor(request, queryset)
+        if self.count_query_param in request.query_params:
+            self.count = estimate_count(queryset)
+        else:
+            self.count = None
+        ordering = self.ordering
+        if reverse:
+            ordering = [(field, not desc) for field, desc in ordering]
+        if values is not None:
+            queryset = queryset.filter(self.after(ordering, values))
+        queryset = queryset.order_by(*(
+            f'-{field}' if desc else field for field, desc in ordering
+        ))
+        results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+        self.page = results
+        self.next_values = self.previous_values = None
+        if results and (has_more or reverse):
+            self.next_values = self.get_values(results[-1])
+        if results and (has_more if reverse else values is not None):
+            self.previous_values = self.get_values(results[0])
+        return results
+
+    def get_ordering(self, queryset):
+        ordering = [
+            field for field in (
+                queryset.query.order_by or queryset.model._meta.ordering
+            ) if isinstance(field, str)
+        ]
+        fields = [
+            (field.lstrip('-'), field.startswith('-')) for field in ordering
+        ]
+        fields = [
+            ('id' if field == 'pk' else field, desc) for field, desc in fields
+        ]
+        if 'id' not in (field for field, _ in fields):
+            fields.append(('id', fields[-1][1] if fields else False))
+        return fields
+
+    def get_values(self, obj):
+        values = []
+        for field, _ in self.ordering:
+            if isinstance(obj, dict):
+                values.append(obj[field])
+                continue
+            value = obj
+            for attribute in field.split('__'):
+                value = getattr(value, attribute)
+            values.append(value)
+        return values
+
+    @staticmethod
+    def after(ordering, values):
+        condition = Q()
+        equal = Q()
+        for (field, desc), value in zip(ordering, values):
+            lookup = 'lt' if desc else 'gt'
+            condition |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+        return condition
+
+    def encode_cursor(self, values, reverse):
+        token = json.dumps({'v': values, 'r': reverse}, default=str)
+        return urlsafe_b64encode(token.encode()).decode()
+
+    @staticmethod
+    def get_field(queryset, path):
+        annotation = queryset.query.annotations.get(path)
+        if annotation is not None:
+            return annotation.output_field
+        model = queryset.model
+        for name in path.split('__'):
+            field = model._meta.get_field(name)
+            model = field.related_model
+        return field
+
+    def decode_cursor(self, request, queryset):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            data = json.loads(urlsafe_b64decode(token.encode()))
+            values, reverse = data['v'], data['r']
+            if not isinstance(values, list) or not isinstance(reverse, bool):
+                raise ValueError
+            if len(values) != len(self.ordering):
+                raise ValueError
+            values = [
+                self.get_field(queryset, field).to_python(value)
+                for (field, _), value in zip(self.ordering, values)
+            ]
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def get_cursor_link(self, values, reverse):
+        if values is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            remove_query_param(url, self.page_query_param),
+            self.cursor_query_param,
+            self.encode_cursor(values, reverse)
+        )
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        response = OrderedDict()
+        if self.count is not None:
+            response['count'] = self.count
+        response['next'] = self.get_cursor_link(self.next_values, False)
+        response['previous'] = self.get_cursor_link(
+            self.previous_values, True
+        )
+        response['results'] = data
+        return Response(response)
+
+
+class CursorPagination(LimitPageNumberPagination):
+    def is_cursor_mode(self, request):
+        return True
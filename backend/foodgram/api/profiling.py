@@ -0,0 +1,177 @@
+import cProfile
+import marshal
+import os
+import sys
+import threading
+from collections import Counter
+from time import perf_counter
+from uuid import uuid4
+
+from django.conf import settings
+from django.utils import timezone
+
+SQL_FRAME_LENGTH = 120
+# Запросы к токенам и паролям пользователей не сохраняются даже без
+# параметров: таблица и столбцы, по которым они распознаются.
+SENSITIVE_COLUMNS = (
+    ('authtoken_token', ''),
+    ('auth_user', '"password"'),
+)
+
+
+class StackSampler:
+    """Сэмплирующий профилировщик одного потока.
+
+    Фоновый поток раз в interval секунд снимает стек профилируемого потока
+    и считает одинаковые стеки. Если в этот момент выполняется SQL, он
+    добавляется листом стека. Результат — свернутые стеки для flame graph.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        self.stacks = Counter()
+        self.sql = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f'{code.co_name} ({os.path.basename(code.co_filename)}'
+                    f':{code.co_firstlineno})'
+                )
+                frame = frame.f_back
+            if not stack:
+                continue
+            stack.reverse()
+            sql = self.sql
+            if sql is not None:
+                stack.append('SQL ' + ' '.join(
+                    sql[:SQL_FRAME_LENGTH].split()
+                ).replace(';', ','))
+            self.stacks[';'.join(stack)] += 1
+
+    def dump(self):
+        return ''.join(
+            f'{stack} {count}\n' for stack, count in self.stacks.items()
+        ).encode()
+
+
+class DeterministicProfiler:
+    """cProfile с выгрузкой в формате pstats."""
+
+    sql = None
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def __enter__(self):
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profile.disable()
+
+    def dump(self):
+        self.profile.create_stats()
+        return marshal.dumps(self.profile.stats)
+
+
+PROFILERS = {
+    'collapsed': ('collapsed', 'text/plain; charset=utf-8'),
+    'pstats': ('prof', 'application/octet-stream'),
+}
+
+
+def create_profiler(mode):
+    if mode == 'pstats':
+        return DeterministicProfiler()
+    return StackSampler(settings.PROFILE_INTERVAL)
+
+
+class SQLRecorder:
+    """Записывает SQL профилируемого запроса и отмечает его в профиле.
+
+    Сохраняется только текст запроса с плейсхолдерами и число параметров:
+    значения могут содержать учетные данные. Запросы к токенам и паролям
+    (SENSITIVE_COLUMNS) заменяются пометкой.
+    """
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.queries = []
+
+    @staticmethod
+    def hide_sensitive(sql):
+        for table, column in SENSITIVE_COLUMNS:
+            if f'"{table}"' in sql and column in sql:
+                return f'-- запрос к {table} скрыт'
+        return sql
+
+    def __call__(self, execute, sql, params, many, context):
+        sql_text = self.hide_sensitive(sql)
+        self.profiler.sql = sql_text
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                (perf_counter() - start, sql_text, len(params or ()))
+            )
+            self.profiler.sql = None
+
+    def dump(self):
+        return ''.join(
+            f'-- {duration * 1000:.1f} ms, {params_count} params\n{sql};\n'
+            for duration, sql, params_count in self.queries
+        ).encode()
+
+
+DUMP_SUFFIXES = {extension for extension, _ in PROFILERS.values()} | {'sql'}
+
+
+def prune_profiles(current):
+    """Оставляет в PROFILE_DIR не больше PROFILE_MAX_DUMPS выгрузок.
+
+    Имена выгрузок начинаются с времени, поэтому удаляются первые по
+    сортировке, кроме только что записанной current.
+    """
+    dumps = {}
+    for file_name in os.listdir(settings.PROFILE_DIR):
+        name, _, suffix = file_name.rpartition('.')
+        if suffix in DUMP_SUFFIXES and name != current:
+            dumps.setdefault(name, []).append(file_name)
+    extra = len(dumps) + 1 - settings.PROFILE_MAX_DUMPS
+    for name in sorted(dumps)[:max(extra, 0)]:
+        for file_name in dumps[name]:
+            try:
+                os.remove(os.path.join(settings.PROFILE_DIR, file_name))
+            except FileNotFoundError:
+                # Выгрузку уже удалил другой процесс.
+                pass
+
+
+def save_profile(mode, content, sql):
+    """Пишет профиль и SQL в PROFILE_DIR и возвращает имя выгрузки."""
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    name = f'{timezone.now():%Y%m%d-%H%M%S}-{uuid4().hex[:8]}'
+    extension, _ = PROFILERS[mode]
+    for suffix, data in ((extension, content), ('sql', sql)):
+        path = os.path.join(settings.PROFILE_DIR, f'{name}.{suffix}')
+        with open(path, 'wb') as dump_file:
+            dump_file.write(data)
+    prune_profiles(name)
+    return name
@@ -0,0 +1,168 @@
+from collections import defaultdict
+from operator import itemgetter
+
+from django.core.files.storage import default_storage
+
+from recipes.images import build_srcset, variant_url
+from recipes.models import IngredientRecipe, RecipeTag
+
+from .serializers import user_flags
+
+USER_COLUMNS = ('id', 'email', 'username', 'first_name', 'last_name')
+RECIPE_COLUMNS = (
+    'id', 'name', 'image', 'image_variants', 'text', 'cooking_time',
+    'author', 'author__email', 'author__username',
+    'author__first_name', 'author__last_name'
+)
+CROP_COLUMNS = (
+    'id', 'author', 'name', 'image', 'image_variants', 'cooking_time'
+)
+
+
+def compile_mapper(*fields):
+    """Превращает строку .values() в словарь с ключами в порядке fields.
+
+    fields — пары (ключ ответа, колонка), порядок повторяет поля
+    сериализатора, чтобы JSON совпадал побайтно.
+    """
+    keys = tuple(key for key, _ in fields)
+    getter = itemgetter(*(column for _, column in fields))
+    return lambda row: dict(zip(keys, getter(row)))
+
+
+map_user = compile_mapper(*((column, column) for column in USER_COLUMNS))
+map_author = compile_mapper(
+    ('id', 'author'),
+    ('email', 'author__email'),
+    ('username', 'author__username'),
+    ('first_name', 'author__first_name'),
+    ('last_name', 'author__last_name'),
+)
+map_follow = compile_mapper(
+    ('email', 'email'),
+    ('id', 'id'),
+    ('username', 'username'),
+    ('first_name', 'first_name'),
+    ('last_name', 'last_name'),
+    ('is_subscribed', 'is_subscribed'),
+)
+map_tag = compile_mapper(
+    ('id', 'tag'),
+    ('name', 'tag__name'),
+    ('color', 'tag__color'),
+    ('slug', 'tag__slug'),
+)
+map_ingredient = compile_mapper(
+    ('id', 'ingredient'),
+    ('name', 'ingredient__name'),
+    ('measurement_unit', 'ingredient__measurement_unit'),
+)
+
+
+def ordered_values(queryset, columns):
+    """.values() с колонками ответа и полями сортировки для курсора."""
+    ordering = (
+        field.lstrip('-') for field in queryset.query.order_by
+        if isinstance(field, str)
+    )
+    extra = [
+        field for field in ordering
+        if field not in columns and field not in ('pk', '?')
+    ]
+    return queryset.prefetch_related(None).values(*columns, *extra)
+
+
+class Reader:
+    """Собирает ответы списков из строк .values() без сериализаторов.
+
+    Вывод совпадает с RecipeGetSerializer, UserProfileSerializer,
+    FollowSerializer и CropRecipeSerializer.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self.flags = user_flags({'request': request}) or defaultdict(
+            frozenset
+        )
+
+    def build_url(self, url):
+        return self.request.build_absolute_uri(url)
+
+    def users(self, rows):
+        follows = self.flags['follows']
+        users = []
+        for row in rows:
+            user = map_user(row)
+            user['is_subscribed'] = row['id'] in follows
+            users.append(user)
+        return users
+
+    def recipes(self, rows):
+        ids = [row['id'] for row in rows]
+        if not ids:
+            return []
+        tags, ingredients = defaultdict(list), defaultdict(list)
+        for row in RecipeTag.objects.filter(recipe__in=ids).order_by(
+            'tag'
+        ).values('recipe', 'tag', 'tag__name', 'tag__color', 'tag__slug'):
+            tags[row['recipe']].append(map_tag(row))
+        for row in IngredientRecipe.objects.filter(recipe__in=ids).order_by(
+            'id'
+        ).values(
+            'recipe', 'ingredient', 'ingredient__name',
+            'ingredient__measurement_unit', 'amount'
+        ):
+            ingredient = map_ingredient(row)
+            ingredient['amount'] = float(row['amount'])
+            ingredients[row['recipe']].append(ingredient)
+        favorites = self.flags['favorites']
+        shopping_cart = self.flags['shopping_cart']
+        follows = self.flags['follows']
+        recipes = []
+        for row in rows:
+            author = map_author(row)
+            author['is_subscribed'] = row['author'] in follows
+            image = row['image']
+            recipes.append({
+                'id': row['id'],
+                'tags': tags[row['id']],
+                'author': author,
+                'ingredients': ingredients[row['id']],
+                'is_favorited': row['id'] in favorites,
+                'is_in_shopping_cart': row['id'] in shopping_cart,
+                'name': row['name'],
+                'image': self.build_url(default_storage.url(image))
+                if image else None,
+                'image_srcset': build_srcset(
+                    image, row['image_variants'], self.build_url
+                ),
+                'text': row['text'],
+                'cooking_time': row['cooking_time'],
+            })
+        return recipes
+
+    def crop_recipe(self, row):
+        image = row['image']
+        return {
+            'id': row['id'],
+            'name': row['name'],
+            'image': self.build_url(
+                variant_url(image, row['image_variants'])
+            ) if image else None,
+            'image_srcset': build_srcset(
+                image, row['image_variants'], self.build_url
+            ),
+            'cooking_time': row['cooking_time'],
+        }
+
+    def subscriptions(self, rows, recipes):
+        authors_recipes = defaultdict(list)
+        for row in recipes:
+            authors_recipes[row['author']].append(self.crop_recipe(row))
+        subscriptions = []
+        for row in rows:
+            author = map_follow(row)
+            author['recipes'] = authors_recipes[row['id']]
+            author['recipes_count'] = row['recipes_count']
+            subscriptions.append(author)
+        return subscriptions
@@ -0,0 +1,68 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class OrjsonRenderer(JSONRenderer):
+    """JSONRenderer на orjson с тем же побайтным выводом.
+
+    Даты и прочие типы, которые orjson пишет по-своему, отдаются
+    кодировщику DRF. С отступами, без orjson и на строках, которые orjson
+    не кодирует, работает обычный JSONRenderer. Расходится только запись
+    чисел с плавающей точкой в экспоненте (1e16 вместо 1e+16), таких чисел
+    в ответах API нет.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if (orjson is None or data is None or indent or self.ensure_ascii
+                or not self.compact):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        try:
+            content = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME
+                | orjson.OPT_NON_STR_KEYS
+            )
+        except orjson.JSONEncodeError:
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        return content.replace(
+            '\u2028'.encode(), b'\\u2028'
+        ).replace('\u2029'.encode(), b'\\u2029')
+
+
+class ShoppingListRenderer(BaseRenderer):
+    """Формат файла списка покупок для выбора по ?format=.
+
+    Сам список отдается потоком мимо рендерера, поэтому сюда попадают
+    только ответы с ошибками, они пишутся строками «поле: сообщение».
+    """
+
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if isinstance(data, dict):
+            data = '\n'.join(
+                f'{field}: {message}' for field, message in data.items()
+            )
+        return str(data).encode(self.charset)
+
+
+class TxtShoppingListRenderer(ShoppingListRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+
+
+class CsvShoppingListRenderer(ShoppingListRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
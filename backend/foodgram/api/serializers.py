@@ -1,12 +1,32 @@
-from django.shortcuts import get_object_or_404
+import json
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 
+from .cache import get_user_flags
+from .fields import RecipeImageField
 from recipes.models import (
-    Favorite, Follow, Ingredient, IngredientRecipe,
-    Recipe, RecipeTag, ShoppingCart, Tag, User
+    Favorite, Follow, ImageUpload, Ingredient, IngredientRecipe,
+    Recipe, ShoppingCart, ShoppingListItem, Tag, User, UserStats
+)
+from recipes.feed import fan_out_recipe
+from recipes.images import (
+    image_srcset, schedule_image_variants, thumbnail_url
 )
+from recipes.search import get_search_backend
+
+
+def user_flags(context):
+    request = context.get('request')
+    if request is None or request.user.is_anonymous:
+        return None
+    if not hasattr(request, 'user_flags'):
+        request.user_flags = get_user_flags(request.user.id)
+    return request.user_flags
 
 
 class UserCreateProfileSerializer(UserCreateSerializer):
@@ -40,13 +60,10 @@ class UserProfileSerializer(UserSerializer):
         read_only_fields = ('id', 'username')
 
     def get_is_subscribed(self, obj):
-        current_user = self.context['request'].user
-        if current_user.is_anonymous:
-            return False
-        return Follow.objects.filter(
-            follower=current_user,
-            author=obj
-        ).exists()
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        flags = user_flags(self.context)
+        return flags is not None and obj.id in flags['follows']
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -88,10 +105,22 @@ class IngredientRecipeSerializer(serializers.ModelSerializer):
         )
 
 
-class RecipeGetSerializer(serializers.ModelSerializer):
+class RecipeImageMixin:
+    def build_url(self, url):
+        request = self.context.get('request')
+        if request is None:
+            return url
+        return request.build_absolute_uri(url)
+
+    def get_image_srcset(self, obj):
+        return image_srcset(obj, self.build_url)
+
+
+class RecipeGetSerializer(RecipeImageMixin, serializers.ModelSerializer):
     tags = serializers.SerializerMethodField()
     author = UserProfileSerializer(read_only=True)
     image = Base64ImageField()
+    image_srcset = serializers.SerializerMethodField()
     ingredients = serializers.SerializerMethodField()
     is_favorited = serializers.SerializerMethodField(read_only=True)
     is_in_shopping_cart = serializers.SerializerMethodField(read_only=True)
@@ -107,44 +136,36 @@ class RecipeGetSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'image_srcset',
             'text',
             'cooking_time'
         )
 
     def get_tags(self, obj):
-        tags = Tag.objects.filter(recipe=obj)
-        return TagSerializer(tags, many=True).data
+        return TagSerializer(obj.tags.all(), many=True).data
 
     def get_ingredients(self, obj):
-        ingredients = IngredientRecipe.objects.filter(recipe=obj)
-        return IngredientRecipeSerializer(ingredients, many=True).data
+        return IngredientRecipeSerializer(
+            obj.ingredientrecipe_set.all(),
+            many=True
+        ).data
 
     def get_is_favorited(self, obj):
-        current_user = self.context['request'].user
-        if current_user.is_anonymous:
-            return False
-        return Favorite.objects.filter(
-            user=current_user,
-            recipe=obj
-        ).exists()
+        flags = user_flags(self.context)
+        return flags is not None and obj.id in flags['favorites']
 
     def get_is_in_shopping_cart(self, obj):
-        current_user = self.context['request'].user
-        if current_user.is_anonymous:
-            return False
-        return ShoppingCart.objects.filter(
-            user=current_user,
-            recipe=obj
-        ).exists()
+        flags = user_flags(self.context)
+        return flags is not None and obj.id in flags['shopping_cart']
 
 
 class RecipeSerializer(serializers.ModelSerializer):
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(), many=True, allow_null=True
+    tags = serializers.ListField(
+        child=serializers.IntegerField(), allow_null=True
     )
-    ingredients = IngredientRecipeSerializer(many=True)
+    ingredients = IngredientRecipeSerializer(many=True, required=False)
     author = UserProfileSerializer(read_only=True)
-    image = Base64ImageField()
+    image = RecipeImageField()
 
     class Meta:
         model = Recipe
@@ -158,95 +179,211 @@ class RecipeSerializer(serializers.ModelSerializer):
             'cooking_time'
         )
 
-    def validate(self, data):
-        ingredients = self.initial_data.get('ingredients')
-        if not ingredients:
+    def validate_tags(self, tags):
+        if not tags:
             raise serializers.ValidationError(
-                'Необходимо добавить игредиенты'
+                'Необходимо выбрать теги'
             )
-        ingredients_list = []
-        for ingredient in ingredients:
-            ingredient_id = ingredient.get('id')
-            ingredient_item = get_object_or_404(
-                Ingredient,
-                id=ingredient_id
+        if len(set(tags)) != len(tags):
+            raise serializers.ValidationError(
+                'Тэги должны быть уникальными!'
             )
-            if ingredient_item in ingredients_list:
-                raise serializers.ValidationError(
-                    'Ингредиенты должны быть уникальными'
-                )
-            ingredients_list.append(ingredient_item)
-            amount = ingredient.get('amount')
-            if int(amount) <= 0:
-                raise serializers.ValidationError(
-                    'Количество ингредиента меньше или равняется нулю'
-                )
-        tags = self.initial_data.get('tags')
-        if not tags:
+        found = Tag.objects.in_bulk(tags)
+        missing = [tag for tag in tags if tag not in found]
+        if missing:
             raise serializers.ValidationError(
-                'Необходимо выбрать теги'
+                f'Теги не найдены: {", ".join(map(str, missing))}'
             )
-        tags_list = []
-        for tag in tags:
-            if tag in tags_list:
+        return [found[tag] for tag in tags]
+
+    @staticmethod
+    def parse_ingredients(ingredients):
+        if isinstance(ingredients, str):
+            try:
+                ingredients = json.loads(ingredients)
+            except ValueError:
                 raise serializers.ValidationError(
-                    'Тэги должны быть уникальными!'
+                    'Ингредиенты указаны неверно'
                 )
-            tags_list.append(tag)
-        cooking_time = self.initial_data.get('cooking_time')
-        if int(cooking_time) <= 0:
+        if not ingredients:
             raise serializers.ValidationError(
-                'Время приготовление указано неверно!'
+                'Необходимо добавить игредиенты'
+            )
+        try:
+            return [
+                (int(ingredient['id']), int(ingredient['amount']))
+                for ingredient in ingredients
+            ]
+        except (KeyError, TypeError, ValueError):
+            raise serializers.ValidationError(
+                'Ингредиенты указаны неверно'
             )
 
-        data['ingredients'] = ingredients
+    def validate_ingredients_data(self, ingredients):
+        items = self.parse_ingredients(ingredients)
+        counts = Counter(ingredient_id for ingredient_id, _ in items)
+        found = Ingredient.objects.in_bulk(counts)
+        errors = []
+        duplicates = [
+            ingredient_id for ingredient_id, count in counts.items()
+            if count > 1
+        ]
+        if duplicates:
+            errors.append(
+                'Ингредиенты должны быть уникальными: '
+                f'{", ".join(map(str, duplicates))}'
+            )
+        missing = [
+            ingredient_id for ingredient_id in counts
+            if ingredient_id not in found
+        ]
+        if missing:
+            errors.append(
+                f'Ингредиенты не найдены: {", ".join(map(str, missing))}'
+            )
+        wrong_amount = [
+            ingredient_id for ingredient_id, amount in items if amount <= 0
+        ]
+        if wrong_amount:
+            errors.append(
+                'Количество ингредиента меньше или равняется нулю: '
+                f'{", ".join(map(str, wrong_amount))}'
+            )
+        if errors:
+            raise serializers.ValidationError(errors)
+        return [
+            {'ingredient': found[ingredient_id], 'amount': amount}
+            for ingredient_id, amount in items
+        ]
+
+    def validate(self, data):
+        if not self.partial or 'ingredients' in self.initial_data:
+            data['ingredients'] = self.validate_ingredients_data(
+                self.initial_data.get('ingredients')
+            )
+        cooking_time = data.get('cooking_time')
+        if cooking_time is not None and cooking_time <= 0:
+            raise serializers.ValidationError(
+                'Время приготовление указано неверно!'
+            )
         return data
 
     @staticmethod
     def create_ingredients(recipe, ingredients):
         IngredientRecipe.objects.bulk_create(
             [IngredientRecipe(
-                ingredient=Ingredient.objects.get(id=ingredient.get('id')),
+                ingredient=ingredient['ingredient'],
                 recipe=recipe,
-                amount=ingredient.get('amount')
+                amount=ingredient['amount']
             ) for ingredient in ingredients]
         )
 
     @staticmethod
     def create_tags(recipe, tags_data):
-        tags = []
-        for name in tags_data:
-            tag = get_object_or_404(Tag, name=name.name)
-            tags.append(tag)
-        recipe.tags.set(tags)
+        recipe.tags.set(tags_data)
         return recipe
 
+    @staticmethod
+    def use_image_upload(validated_data):
+        upload = validated_data.get('image')
+        if isinstance(upload, ImageUpload):
+            validated_data['image'] = upload.image.name
+            upload.delete()
+
+    @transaction.atomic
     def create(self, validated_data):
+        self.use_image_upload(validated_data)
         ingredients_data = validated_data.pop('ingredients')
         tags_data = validated_data.pop('tags')
         image = validated_data.pop('image')
         recipe = Recipe.objects.create(image=image, **validated_data)
+        UserStats.objects.filter(user=recipe.author_id).increment(
+            'recipes_count'
+        )
+        fan_out_recipe(recipe)
         self.create_tags(recipe=recipe, tags_data=tags_data)
         self.create_ingredients(recipe=recipe, ingredients=ingredients_data)
+        get_search_backend().index(recipe)
+        schedule_image_variants(recipe)
         return recipe
 
+    @staticmethod
+    def update_ingredients(recipe, ingredients):
+        current = {
+            item.ingredient_id: item
+            for item in IngredientRecipe.objects.filter(recipe=recipe)
+        }
+        amounts = {
+            ingredient['ingredient'].id: ingredient['amount']
+            for ingredient in ingredients
+        }
+        removed = current.keys() - amounts.keys()
+        added = [
+            ingredient for ingredient in ingredients
+            if ingredient['ingredient'].id not in current
+        ]
+        changed = []
+        for ingredient_id, item in current.items():
+            amount = amounts.get(ingredient_id, item.amount)
+            if amount != item.amount:
+                item.amount = amount
+                changed.append(item)
+        if removed:
+            IngredientRecipe.objects.filter(
+                recipe=recipe, ingredient__in=removed
+            ).delete()
+        if added:
+            RecipeSerializer.create_ingredients(recipe, added)
+        if changed:
+            IngredientRecipe.objects.bulk_update(changed, ['amount'])
+        return removed, {
+            ingredient['ingredient'].id for ingredient in added
+        }, {item.ingredient_id for item in changed}
+
+    @transaction.atomic
     def update(self, instance, validated_data):
-        tags = validated_data.get('tags')
-        ingredients = validated_data.get('ingredients')
-        RecipeTag.objects.filter(recipe=instance).delete()
-        IngredientRecipe.objects.filter(recipe=instance).delete()
-        self.create_tags(recipe=instance, tags_data=tags)
-        self.create_ingredients(recipe=instance, ingredients=ingredients)
-        instance.name = validated_data.get('name', instance.name)
-        instance.cooking_time = validated_data.get(
-            'cooking_time', instance.cooking_time
+        self.use_image_upload(validated_data)
+        tags = validated_data.pop('tags', None)
+        ingredients = validated_data.pop('ingredients', None)
+        reindex = any(
+            field in validated_data and validated_data[field] != getattr(
+                instance, field
+            ) for field in ('name', 'text')
         )
-        instance.text = validated_data.get('text', instance.text)
-        instance.image = validated_data.get('image', instance.image)
+        if tags is not None:
+            self.create_tags(recipe=instance, tags_data=tags)
+        if ingredients is not None:
+            removed, added, changed = self.update_ingredients(
+                recipe=instance, ingredients=ingredients
+            )
+            if removed or added or changed:
+                ShoppingListItem.objects.refresh(
+                    users=ShoppingCart.objects.filter(
+                        recipe=instance
+                    ).values('user'),
+                    ingredients=removed | added | changed
+                )
+            reindex = reindex or bool(removed or added)
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        if 'image' in validated_data:
+            instance.image_variants = {}
         instance.save()
+        if reindex:
+            get_search_backend().index(instance)
+        if 'image' in validated_data:
+            schedule_image_variants(instance)
         return instance
 
     def to_representation(self, recipe):
+        prefetch_related_objects(
+            [recipe],
+            'tags',
+            Prefetch(
+                'ingredientrecipe_set',
+                queryset=IngredientRecipe.objects.select_related('ingredient')
+            )
+        )
         data = RecipeGetSerializer(
             recipe,
             context={'request': self.context.get('request')}
@@ -254,8 +391,9 @@ class RecipeSerializer(serializers.ModelSerializer):
         return data
 
 
-class CropRecipeSerializer(serializers.ModelSerializer):
-    image = Base64ImageField()
+class CropRecipeSerializer(RecipeImageMixin, serializers.ModelSerializer):
+    image = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
@@ -263,9 +401,15 @@ class CropRecipeSerializer(serializers.ModelSerializer):
             'id',
             'name',
             'image',
+            'image_srcset',
             'cooking_time'
         )
 
+    def get_image(self, obj):
+        if not obj.image:
+            return None
+        return self.build_url(thumbnail_url(obj))
+
 
 class FollowSerializer(UserProfileSerializer):
     recipes = serializers.SerializerMethodField(read_only=True)
@@ -310,10 +454,13 @@ class FollowSerializer(UserProfileSerializer):
 
     def get_recipes(self, obj):
         request = self.context.get('request')
-        limit = request.GET.get('recipes_limit')
-        recipes = obj.recipes.all()
-        if limit:
-            recipes = recipes.all()[:int(limit)]
+        if 'recipes' in self.context:
+            recipes = self.context['recipes'].get(obj.id, [])
+        else:
+            limit = request.GET.get('recipes_limit')
+            recipes = obj.recipes.all()
+            if limit:
+                recipes = recipes.all()[:int(limit)]
         return CropRecipeSerializer(
             recipes,
             context={'request': request},
@@ -321,6 +468,11 @@ class FollowSerializer(UserProfileSerializer):
         ).data
 
     def get_recipes_count(self, obj):
+        if hasattr(obj, 'recipes_count'):
+            return obj.recipes_count
+        stats = getattr(obj, 'stats', None)
+        if stats is not None:
+            return stats.recipes_count
         return obj.recipes.count()
 
 
@@ -0,0 +1,67 @@
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_init, post_save
+)
+from django.dispatch import receiver
+
+from recipes.models import (
+    Ingredient, IngredientRecipe, Recipe, RecipeTag, Tag, User, UserStats
+)
+
+from .cache import (
+    INGREDIENTS_VERSION_KEY, TAGS_VERSION_KEY, bump_version,
+    invalidate_recipes
+)
+
+AUTHOR_FIELDS = frozenset(('email', 'username', 'first_name', 'last_name'))
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredients(**kwargs):
+    bump_version(INGREDIENTS_VERSION_KEY)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def invalidate_tags(**kwargs):
+    bump_version(TAGS_VERSION_KEY)
+
+
+@receiver(post_save, sender=User)
+def create_user_stats(instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserStats.objects.create(user=instance)
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+@receiver((post_save, post_delete), sender=RecipeTag)
+@receiver((post_save, post_delete), sender=IngredientRecipe)
+@receiver(m2m_changed, sender=RecipeTag)
+@receiver(m2m_changed, sender=IngredientRecipe)
+def invalidate_recipe_responses(**kwargs):
+    invalidate_recipes()
+
+
+def get_author_fields(instance):
+    return {
+        field: instance.__dict__[field]
+        for field in AUTHOR_FIELDS if field in instance.__dict__
+    }
+
+
+@receiver(post_init, sender=User)
+def remember_author_fields(instance, **kwargs):
+    instance._saved_author_fields = get_author_fields(instance)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_responses(instance, created, **kwargs):
+    # У нового пользователя еще нет рецептов, а смена пароля или last_login
+    # не меняет ответы: сбрасываем кэш, только если изменились поля автора.
+    saved = instance._saved_author_fields
+    instance._saved_author_fields = get_author_fields(instance)
+    if not created and saved != instance._saved_author_fields:
+        invalidate_recipes()
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_author_responses(**kwargs):
+    invalidate_recipes()
@@ -0,0 +1,153 @@
+import os
+from csv import DictReader
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.cache import (
+    INGREDIENTS_VERSION_KEY, TAGS_VERSION_KEY, bump_version, get_user_flags
+)
+from recipes.models import (
+    Favorite, Follow, Ingredient, IngredientRecipe, Recipe, RecipeTag,
+    ShoppingCart, ShoppingListItem, Tag, User
+)
+from recipes.feed import rebuild_timelines
+from recipes.search import get_search_backend
+
+AUTHORS_COUNT = 30
+RECIPES_PER_AUTHOR = 10
+INGREDIENTS_PER_RECIPE = 10
+TAGS_COUNT = 3
+
+QUERY_TIME_BUDGET = 0.5
+
+IMAGE = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJ'
+    'AAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=='
+)
+
+
+class FoodgramTestCase(TestCase):
+    """Каталог ингредиентов, 30 авторов и 300 рецептов для тестов API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        path = os.path.join(
+            settings.BASE_DIR, 'static', 'data', 'ingredients.csv'
+        )
+        with open(path, encoding='utf-8') as csv_file:
+            Ingredient.objects.bulk_create(
+                Ingredient(name=row['name'], measurement_unit=row['unit'])
+                for row in DictReader(csv_file)
+            )
+        bump_version(INGREDIENTS_VERSION_KEY)
+        ingredients = list(Ingredient.objects.all())
+        Tag.objects.bulk_create(
+            Tag(name=f'Тег {i}', color=f'#00000{i}', slug=f'tag_{i}')
+            for i in range(TAGS_COUNT)
+        )
+        bump_version(TAGS_VERSION_KEY)
+        cls.tags = list(Tag.objects.all())
+        cls.user = User.objects.create_user(
+            username='reader', email='reader@foodgram.ru', password='pass'
+        )
+        cls.authors = [
+            User.objects.create_user(
+                username=f'author_{i}',
+                email=f'author_{i}@foodgram.ru',
+                password='pass'
+            ) for i in range(AUTHORS_COUNT)
+        ]
+        Recipe.objects.bulk_create(
+            Recipe(
+                author=author,
+                name=f'Рецепт {author.username} {i}',
+                text='Описание',
+                cooking_time=10,
+                image='recipes/image.png'
+            )
+            for author in cls.authors for i in range(RECIPES_PER_AUTHOR)
+        )
+        recipes = list(Recipe.objects.all())
+        RecipeTag.objects.bulk_create(
+            RecipeTag(recipe=recipe, tag=tag)
+            for recipe in recipes for tag in cls.tags[:2]
+        )
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(
+                recipe=recipe,
+                ingredient=ingredients[(recipe.id + i) % len(ingredients)],
+                amount=i + 1
+            )
+            for recipe in recipes for i in range(INGREDIENTS_PER_RECIPE)
+        )
+        Follow.objects.bulk_create(
+            Follow(follower=cls.user, author=author)
+            for author in cls.authors[1:]
+        )
+        Favorite.objects.bulk_create(
+            Favorite(user=cls.user, recipe=recipe) for recipe in recipes[::2]
+        )
+        ShoppingCart.objects.bulk_create(
+            ShoppingCart(user=cls.user, recipe=recipe)
+            for recipe in recipes[::3]
+        )
+        ShoppingListItem.objects.refresh(users=[cls.user.id])
+        call_command('recount', stdout=StringIO())
+        rebuild_timelines([cls.user.id])
+        search_backend = get_search_backend()
+        for recipe in recipes:
+            search_backend.index(recipe)
+        cls.recipe = recipes[0]
+
+    def setUp(self):
+        cache.clear()
+        get_user_flags(self.user.id)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assert_query_budget(self, max_queries, method, url, status=200,
+                            data=None):
+        kwargs = {} if data is None else {'data': data, 'format': 'json'}
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(url, **kwargs)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, status)
+        self.assertLessEqual(
+            len(context), max_queries,
+            '\n'.join(query['sql'] for query in context.captured_queries)
+        )
+        total_time = sum(
+            float(query['time']) for query in context.captured_queries
+        )
+        self.assertLess(total_time, QUERY_TIME_BUDGET)
+        return len(context)
+
+    def assert_constant_queries(self, max_queries, urls):
+        counts = {
+            url: self.assert_query_budget(max_queries, 'get', url)
+            for url in urls
+        }
+        self.assertEqual(len(set(counts.values())), 1, counts)
+
+    def recipe_data(self, ingredients_count):
+        return {
+            'name': f'Рецепт из {ingredients_count} ингредиентов',
+            'text': 'Описание',
+            'cooking_time': 10,
+            'image': IMAGE,
+            'tags': [tag.id for tag in self.tags],
+            'ingredients': [
+                {'id': ingredient_id, 'amount': 10}
+                for ingredient_id in Ingredient.objects.order_by(
+                    'id'
+                ).values_list('id', flat=True)[:ingredients_count]
+            ],
+        }
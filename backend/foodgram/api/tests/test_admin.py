@@ -0,0 +1,31 @@
+from api.tests.base import FoodgramTestCase
+from recipes.models import User
+
+
+class AdminTestCase(FoodgramTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_superuser(
+            username='admin', email='admin@foodgram.ru', password='pass'
+        ))
+
+    def test_recipe_change_form(self):
+        response = self.client.get(
+            f'/admin/recipes/recipe/{self.recipe.id}/change/'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(response.content.count(b'<option'), 100)
+
+    def test_ingredient_autocomplete(self):
+        response = self.client.get('/admin/autocomplete/', {
+            'app_label': 'recipes',
+            'model_name': 'ingredientrecipe',
+            'field_name': 'ingredient',
+            'term': 'сол',
+        })
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertTrue(results)
+        self.assertTrue(all(
+            'сол' in result['text'].lower() for result in results
+        ))
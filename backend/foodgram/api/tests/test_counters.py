@@ -0,0 +1,61 @@
+from api.tests.base import RECIPES_PER_AUTHOR, FoodgramTestCase
+from recipes.models import Recipe, UserStats
+
+
+class CountersTestCase(FoodgramTestCase):
+    def test_counters(self):
+        url = f'/api/recipes/{self.recipe.id}/'
+        self.client.delete(url + 'favorite/')
+        self.client.delete(url + 'shopping_cart/')
+        self.recipe.refresh_from_db()
+        self.assertEqual(
+            (self.recipe.favorites_count, self.recipe.in_carts_count), (0, 0)
+        )
+        self.client.post(url + 'favorite/')
+        self.client.post(url + 'shopping_cart/')
+        self.recipe.refresh_from_db()
+        self.assertEqual(
+            (self.recipe.favorites_count, self.recipe.in_carts_count), (1, 1)
+        )
+        author = self.authors[0]
+        self.client.delete(f'/api/users/{author.id}/subscribe/')
+        self.assertEqual(author.stats.followers_count, 0)
+        response = self.client.post(f'/api/users/{author.id}/subscribe/')
+        self.assertEqual(
+            response.data['recipes_count'], RECIPES_PER_AUTHOR
+        )
+        author.stats.refresh_from_db()
+        self.assertEqual(author.stats.followers_count, 1)
+        response = self.client.get(
+            '/api/recipes/?ordering=-favorites_count&limit=50'
+        )
+        counts = [
+            Recipe.objects.get(id=recipe['id']).favorites_count
+            for recipe in response.data['results']
+        ]
+        self.assertEqual(counts, sorted(counts, reverse=True))
+
+    def test_counters_do_not_go_negative(self):
+        # Связи созданы в обход API, счетчики отстают от них.
+        Recipe.objects.update(favorites_count=0, in_carts_count=0)
+        UserStats.objects.update(followers_count=0, recipes_count=0)
+        url = f'/api/recipes/{self.recipe.id}/'
+        for action in ('favorite/', 'shopping_cart/'):
+            with self.subTest(action=action):
+                response = self.client.delete(url + action)
+                self.assertEqual(response.status_code, 204)
+        self.recipe.refresh_from_db()
+        self.assertEqual(
+            (self.recipe.favorites_count, self.recipe.in_carts_count), (0, 0)
+        )
+        author = self.authors[1]
+        response = self.client.delete(f'/api/users/{author.id}/subscribe/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(
+            UserStats.objects.get(user=author).followers_count, 0
+        )
+        self.client.force_authenticate(self.recipe.author)
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(
+            UserStats.objects.get(user=self.recipe.author).recipes_count, 0
+        )
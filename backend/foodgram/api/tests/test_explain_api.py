@@ -0,0 +1,27 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from api.tests.base import FoodgramTestCase
+from recipes.management.commands.explain_api import suggest_index
+from recipes.models import Recipe
+
+
+class ExplainApiTestCase(FoodgramTestCase):
+    def test_report(self):
+        out = StringIO()
+        call_command('explain_api', user=self.user.id, min_rows=1, stdout=out)
+        report = out.getvalue()
+        self.assertIn('Проверено запросов SQL', report)
+        self.assertIn('[seq_scan] recipes_ingredient', report)
+
+    def test_suggest_index(self):
+        sql = str(Recipe.objects.filter(cooking_time=10).order_by('-id').query)
+        self.assertEqual(suggest_index(Recipe, sql), (
+            'Recipe.Meta.indexes: models.Index('
+            "fields=['cooking_time', '-id'], "
+            "name='recipe_cooking_time_id_idx')",
+            False
+        ))
+        sql = str(Recipe.objects.filter(author=1).order_by('-id').query)
+        self.assertTrue(suggest_index(Recipe, sql)[1])
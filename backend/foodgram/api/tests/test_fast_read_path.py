@@ -0,0 +1,46 @@
+from django.core.cache import cache
+
+from api.tests.base import FoodgramTestCase
+from recipes.models import Recipe
+from recipes.trending import update_trends
+
+
+class FastReadPathTestCase(FoodgramTestCase):
+    def test_same_content(self):
+        Recipe.objects.filter(id=self.recipe.id).update(
+            name='Рецепт\u2028с "кавычками"',
+            image_variants={
+                'image/webp': [['cache/a.webp', 320]],
+                'image/jpeg': [['cache/a.jpg', 320]],
+            }
+        )
+        Recipe.objects.filter(id=self.recipe.id + 1).update(image='')
+        update_trends()
+        cursor = self.client.get(
+            '/api/recipes/?cursor&limit=3&ordering=-favorites_count'
+        ).data['next']
+        urls = (
+            '/api/recipes/?limit=50',
+            f'/api/recipes/?limit=50&tags={self.tags[0].slug}',
+            '/api/recipes/?limit=50&search=рецепты автора',
+            cursor,
+            '/api/recipes/feed/?limit=50',
+            '/api/recipes/trending/?cursor&limit=10',
+            '/api/users/?limit=50',
+            '/api/users/subscriptions/?limit=50',
+            '/api/users/subscriptions/?limit=50&recipes_limit=2',
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                with self.settings(FAST_READ_PATH=False):
+                    expected = self.client.get(url).content
+                content = self.client.get(url).content
+                self.assertEqual(content, expected)
+        self.client.force_authenticate(None)
+        with self.settings(FAST_READ_PATH=False):
+            expected = self.client.get('/api/recipes/?limit=50').content
+        cache.clear()
+        self.assertEqual(
+            self.client.get('/api/recipes/?limit=50').content, expected
+        )
+        self.assertIn(b'\\u2028', expected)
@@ -0,0 +1,72 @@
+import tempfile
+
+from django.db.models import Count
+
+from api.tests.base import RECIPES_PER_AUTHOR, FoodgramTestCase
+from recipes.feed import rebuild_timelines
+from recipes.models import Recipe, TimelineEntry
+
+
+class FeedTestCase(FoodgramTestCase):
+    def test_timeline(self):
+        response = self.client.get('/api/recipes/feed/?limit=50')
+        ids = [recipe['id'] for recipe in response.data['results']]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertLessEqual(
+            {recipe['author']['id'] for recipe in response.data['results']},
+            {author.id for author in self.authors[1:]}
+        )
+        response = self.client.get(response.data['next'])
+        self.assertLess(response.data['results'][0]['id'], ids[-1])
+
+        author = self.authors[0]
+        url = f'/api/users/{author.id}/subscribe/'
+        self.client.post(url)
+        feed = Recipe.objects.filter(timeline_entries__user=self.user)
+        self.assertEqual(
+            feed.filter(author=author).count(), RECIPES_PER_AUTHOR
+        )
+        self.client.delete(url)
+        self.assertFalse(feed.filter(author=author).exists())
+
+        self.client.force_authenticate(self.authors[1])
+        with tempfile.TemporaryDirectory() as media_root:
+            with self.settings(MEDIA_ROOT=media_root):
+                response = self.client.post(
+                    '/api/recipes/', self.recipe_data(1), format='json'
+                )
+        self.assertTrue(feed.filter(id=response.data['id']).exists())
+
+        with self.settings(FEED_FANOUT_LIMIT=0):
+            self.client.force_authenticate(self.user)
+            response = self.client.get('/api/recipes/feed/?limit=50')
+            self.assertEqual(len(response.data['results']), 50)
+            self.assertEqual(
+                response.data['results'][0]['author']['id'],
+                self.authors[1].id
+            )
+
+    def test_rebuild_limit(self):
+        entries = TimelineEntry.objects.filter(user=self.user)
+        expected = set(entries.values_list('author', 'recipe'))
+        with self.settings(FEED_BACKFILL_LIMIT=2):
+            rebuild_timelines([self.user.id])
+        per_author = dict(entries.values_list('author').annotate(
+            count=Count('id')
+        ).order_by())
+        self.assertEqual(
+            per_author, {author.id: 2 for author in self.authors[1:]}
+        )
+        self.assertEqual(
+            set(entries.values_list('author', 'recipe')),
+            {
+                (author, recipe) for author, recipe in expected
+                if recipe in Recipe.objects.filter(
+                    author=author
+                ).order_by('-id').values_list('id', flat=True)[:2]
+            }
+        )
+        rebuild_timelines()
+        self.assertEqual(
+            set(entries.values_list('author', 'recipe')), expected
+        )
@@ -0,0 +1,63 @@
+import base64
+import json
+import tempfile
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+
+from api.tests.base import IMAGE, FoodgramTestCase
+from recipes.models import ImageUpload
+
+
+class ImageUploadTestCase(FoodgramTestCase):
+    def test_upload(self):
+        png = base64.b64decode(IMAGE.split(';base64,')[1])
+        with tempfile.TemporaryDirectory() as media_root:
+            with self.settings(MEDIA_ROOT=media_root):
+                response = self.client.post('/api/recipes/images/', {
+                    'image': SimpleUploadedFile('image.png', png)
+                })
+                self.assertEqual(response.status_code, 201)
+                data = self.recipe_data(3)
+                data['image'] = response.data['token']
+                response = self.client.post(
+                    '/api/recipes/', data, format='json'
+                )
+                self.assertEqual(response.status_code, 201)
+                self.assertTrue(response.data['image'].endswith('.png'))
+                self.assertFalse(ImageUpload.objects.exists())
+                response = self.client.post(
+                    '/api/recipes/', data, format='json'
+                )
+                self.assertEqual(response.status_code, 400)
+
+                data = self.recipe_data(3)
+                data['image'] = SimpleUploadedFile('image.png', png)
+                data['ingredients'] = json.dumps(data['ingredients'])
+                response = self.client.post(
+                    '/api/recipes/', data, format='multipart'
+                )
+                self.assertEqual(response.status_code, 201)
+                self.assertEqual(len(response.data['ingredients']), 3)
+
+                response = self.client.post('/api/recipes/images/', {
+                    'image': SimpleUploadedFile('image.png', b'not image')
+                })
+                self.assertEqual(response.status_code, 400)
+
+    def test_pixels_limit(self):
+        png = base64.b64decode(IMAGE.split(';base64,')[1])
+        url = '/api/recipes/images/'
+        with tempfile.TemporaryDirectory() as media_root:
+            with self.settings(MEDIA_ROOT=media_root):
+                with mock.patch.object(Image, 'MAX_IMAGE_PIXELS', None):
+                    response = self.client.post(url, {
+                        'image': SimpleUploadedFile('image.png', png)
+                    })
+                self.assertEqual(response.status_code, 201)
+                with self.settings(RECIPE_IMAGE_MAX_PIXELS=0):
+                    response = self.client.post(url, {
+                        'image': SimpleUploadedFile('image.png', png)
+                    })
+                self.assertEqual(response.status_code, 400)
@@ -0,0 +1,87 @@
+import base64
+import os
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.core.cache import cache
+from PIL import Image
+
+from api.tests.base import FoodgramTestCase
+from recipes.images import process_recipe_image
+from recipes.models import Favorite, Recipe
+
+
+def png(width, height):
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), '#E26C2D').save(buffer, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+class ImageVariantsTestCase(FoodgramTestCase):
+    def test_srcset(self):
+        Recipe.objects.filter(id=self.recipe.id).update(image_variants={
+            'image/webp': [['cache/a.webp', 320], ['cache/b.webp', 640]],
+            'image/jpeg': [['cache/a.jpg', 320], ['cache/b.jpg', 640]],
+        })
+        response = self.client.get(f'/api/recipes/{self.recipe.id}/')
+        self.assertEqual(
+            response.data['image_srcset']['image/webp'],
+            'http://testserver/media/cache/a.webp 320w, '
+            'http://testserver/media/cache/b.webp 640w'
+        )
+        self.assertEqual(
+            response.data['image'], 'http://testserver/media/recipes/image.png'
+        )
+        Favorite.objects.filter(user=self.user, recipe=self.recipe).delete()
+        response = self.client.post(
+            f'/api/recipes/{self.recipe.id}/favorite/'
+        )
+        self.assertEqual(
+            response.data['image'], 'http://testserver/media/cache/a.jpg'
+        )
+        other = Recipe.objects.exclude(id=self.recipe.id).first()
+        response = self.client.get(f'/api/recipes/{other.id}/')
+        self.assertEqual(response.data['image_srcset'], {
+            'image/png': 'http://testserver/media/recipes/image.png'
+        })
+
+    def test_variants_worker(self):
+        self.client.force_authenticate(self.authors[0])
+        anonymous = self.client_class()
+        url = f'/api/recipes/{self.recipe.id}/'
+        with tempfile.TemporaryDirectory() as media_root:
+            with self.settings(MEDIA_ROOT=media_root), mock.patch(
+                'recipes.images.get_executor'
+            ) as get_executor:
+                get_executor.return_value.submit.side_effect = (
+                    lambda run, recipe_id: process_recipe_image(recipe_id)
+                )
+                cache.clear()
+                anonymous.get(url)
+                data = self.recipe_data(1)
+                data['image'] = png(200, 150)
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.client.patch(url, data, format='json')
+                    recipe = Recipe.objects.get(id=self.recipe.id)
+                    self.assertEqual(recipe.image_variants, {})
+                get_executor.return_value.submit.assert_called_once()
+                recipe.refresh_from_db()
+                for content_type, extension in (
+                    ('image/webp', '.webp'), ('image/jpeg', '.jpg')
+                ):
+                    with self.subTest(content_type=content_type):
+                        variants = recipe.image_variants[content_type]
+                        self.assertEqual(
+                            [width for _, width in variants], [200]
+                        )
+                        for name, width in variants:
+                            self.assertTrue(name.startswith('recipes/'))
+                            self.assertTrue(name.endswith(extension))
+                            path = os.path.join(media_root, name)
+                            with Image.open(path) as image:
+                                self.assertEqual(image.width, width)
+                srcset = anonymous.get(url).json()['image_srcset']
+                self.assertTrue(srcset['image/webp'].endswith('.webp 200w'))
@@ -0,0 +1,58 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.ingredient_index import ingredient_index
+from recipes.models import Ingredient
+
+NAMES = ('Соль', 'соль морская', 'Фасоль', 'Солод', 'Ёжевика', 'Перец')
+
+
+class IngredientIndexTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit='г') for name in NAMES
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def names(self, query):
+        return [item['name'] for item in ingredient_index.search(query)]
+
+    def test_casefolded_cyrillic(self):
+        self.assertEqual(
+            self.names('СОЛЬ'), ['Соль', 'соль морская', 'Фасоль']
+        )
+        self.assertEqual(self.names('  ежев '), ['Ёжевика'])
+        self.assertEqual(self.names('ЁЖ'), ['Ёжевика'])
+        self.assertEqual(self.names('кориандр'), [])
+
+    def test_prefix_before_substring(self):
+        self.assertEqual(
+            self.names('сол'), ['Солод', 'Соль', 'соль морская', 'Фасоль']
+        )
+        self.assertEqual(self.names('оль'), ['Соль', 'соль морская', 'Фасоль'])
+        response = APIClient().get('/api/ingredients/?name=сол')
+        self.assertEqual(
+            [item['name'] for item in response.json()],
+            ['Солод', 'Соль', 'соль морская', 'Фасоль']
+        )
+        self.assertEqual(
+            set(response.json()[0]), {'id', 'name', 'measurement_unit'}
+        )
+
+    def test_invalidation(self):
+        self.assertEqual(self.names('солян'), [])
+        ingredient = Ingredient.objects.create(
+            name='Солянка', measurement_unit='г'
+        )
+        self.assertEqual(self.names('солян'), ['Солянка'])
+        ingredient.measurement_unit = 'кг'
+        ingredient.save()
+        self.assertEqual(
+            ingredient_index.search('солян')[0]['measurement_unit'], 'кг'
+        )
+        ingredient.delete()
+        self.assertEqual(self.names('солян'), [])
@@ -0,0 +1,62 @@
+import json
+
+from api.metrics import metrics
+from api.tests.base import FoodgramTestCase
+
+
+class PerformanceMiddlewareTestCase(FoodgramTestCase):
+    def test_server_timing(self):
+        response = self.client.get('/api/recipes/?limit=6')
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        for fast_read_path in (True, False):
+            with self.subTest(fast_read_path=fast_read_path):
+                with self.settings(FAST_READ_PATH=fast_read_path):
+                    response = self.client.get('/api/recipes/?limit=50')
+                phases = {
+                    name: float(duration.split(';')[0])
+                    for name, duration in (
+                        entry.split(';dur=')
+                        for entry in response['Server-Timing'].split(', ')
+                    )
+                }
+                self.assertEqual(
+                    list(phases), ['db', 'app', 'ser', 'encode', 'total']
+                )
+                self.assertGreater(phases['ser'], 0)
+                total = phases.pop('total')
+                self.assertLessEqual(sum(phases.values()), total + 0.5)
+
+    def test_slow_request_log(self):
+        with self.settings(SLOW_REQUEST_MS=0):
+            with self.assertLogs('api.middleware', 'WARNING') as logs:
+                self.client.get(f'/api/recipes/{self.recipe.id}/')
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual(entry['route'], 'RecipesViewSet.retrieve')
+        self.assertTrue(entry['top_queries'])
+        self.assertEqual(
+            set(entry['timing_ms']), {'db', 'app', 'ser', 'encode', 'total'}
+        )
+
+    def test_metrics(self):
+        metrics.reset()
+        self.client.get('/api/recipes/?limit=6')
+        self.client.get(f'/api/recipes/{self.recipe.id}/')
+        self.assertEqual(self.client.get('/api/_metrics').status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get('/api/_metrics')
+        self.assertEqual(response.status_code, 200)
+        content = response.content.decode()
+        self.assertIn(
+            'foodgram_requests_total{route="RecipesViewSet.list",'
+            'method="GET",status="200"} 1', content
+        )
+        self.assertIn(
+            'foodgram_request_duration_seconds_count'
+            '{route="RecipesViewSet.retrieve",method="GET"} 1', content
+        )
+        self.assertIn(
+            'foodgram_request_serialize_seconds_count'
+            '{route="RecipesViewSet.retrieve",method="GET"} 1', content
+        )
@@ -0,0 +1,76 @@
+import json
+from base64 import urlsafe_b64encode
+from urllib.parse import urlencode
+
+from api.tests.base import FoodgramTestCase
+
+
+def cursor(data):
+    return urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+
+class CursorPaginationTestCase(FoodgramTestCase):
+    def walk(self, url):
+        ids = []
+        while url:
+            data = self.client.get(url).data
+            ids += [recipe['id'] for recipe in data['results']]
+            url = data['next']
+        return ids
+
+    def test_tampered_cursor(self):
+        for token in (
+            cursor({'v': ['abc'], 'r': False}),
+            cursor({'v': [{'id': 1}], 'r': False}),
+            cursor({'v': [1, 2], 'r': False}),
+            cursor({'v': 1, 'r': False}),
+            cursor({'v': [1], 'r': 'yes'}),
+            cursor({'v': [1]}),
+            cursor([1]),
+            'not-base64!',
+            urlsafe_b64encode(b'\xff').decode(),
+        ):
+            with self.subTest(token=token):
+                response = self.client.get(f'/api/recipes/?cursor={token}')
+                self.assertEqual(response.status_code, 404)
+        response = self.client.get(
+            '/api/recipes/?ordering=-favorites_count&cursor='
+            + cursor({'v': ['many', 1], 'r': False})
+        )
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(
+            '/api/recipes/?cursor=' + cursor({'v': ['100'], 'r': False})
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['id'], 99)
+
+    def test_previous(self):
+        url = '/api/recipes/?cursor&limit=7'
+        first = self.client.get(url).data
+        self.assertIsNone(first['previous'])
+        second = self.client.get(first['next']).data
+        third = self.client.get(second['next']).data
+        back = self.client.get(third['previous']).data
+        self.assertEqual(back['results'], second['results'])
+        back = self.client.get(back['previous']).data
+        self.assertEqual(back['results'], first['results'])
+        self.assertIsNone(back['previous'])
+        self.assertEqual(
+            self.client.get(back['next']).data['results'], second['results']
+        )
+
+    def test_compound_ordering(self):
+        for query in (
+            'ordering=-favorites_count',
+            'ordering=in_carts_count',
+            urlencode({'search': 'рецепт author_1'}),
+        ):
+            with self.subTest(query=query):
+                expected = [
+                    recipe['id'] for recipe in self.client.get(
+                        f'/api/recipes/?{query}&limit=500'
+                    ).data['results']
+                ]
+                ids = self.walk(f'/api/recipes/?{query}&cursor&limit=7')
+                self.assertEqual(ids, expected)
+                self.assertEqual(len(set(ids)), len(ids))
@@ -0,0 +1,84 @@
+import os
+import pstats
+import tempfile
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.profiling import SQLRecorder
+from api.tests.base import FoodgramTestCase
+
+
+class ProfileMiddlewareTestCase(FoodgramTestCase):
+    def test_staff_profile(self):
+        client = APIClient()
+        token = Token.objects.create(user=self.user)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        url = '/api/recipes/?limit=50'
+        with tempfile.TemporaryDirectory() as profile_dir:
+            with self.settings(PROFILE_DIR=profile_dir, PROFILE_INTERVAL=0):
+                response = client.get(url + '&_profile=1')
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn('X-Profile-Dump', response)
+                self.user.is_staff = True
+                self.user.save()
+
+                response = client.get(url + '&_profile=1')
+                self.assertEqual(response['X-Profile-Status'], '200')
+                self.assertTrue(int(response['X-Profile-Queries']))
+                for line in response.content.decode().splitlines():
+                    self.assertRegex(line, r'^\S.* \d+$')
+                name = response['X-Profile-Dump']
+                with open(os.path.join(profile_dir, f'{name}.sql')) as dump:
+                    sql = dump.read()
+                self.assertIn('FROM "recipes_recipe"', sql)
+                self.assertIn('запрос к authtoken_token скрыт', sql)
+                self.assertNotIn(token.key, sql)
+                self.assertNotIn('pbkdf2', sql)
+
+                response = client.get(url, HTTP_X_PROFILE='pstats')
+                path = os.path.join(
+                    profile_dir, f'{response["X-Profile-Dump"]}.prof'
+                )
+                self.assertTrue(pstats.Stats(path).total_calls)
+
+                self.assertEqual(len(os.listdir(profile_dir)), 4)
+
+    def test_sampled_streaming_response(self):
+        with tempfile.TemporaryDirectory() as profile_dir:
+            with self.settings(
+                PROFILE_DIR=profile_dir, PROFILE_INTERVAL=0,
+                PROFILE_SAMPLE_RATE=1
+            ):
+                response = self.client.get(
+                    '/api/recipes/download_shopping_cart/'
+                )
+                self.assertEqual(len(os.listdir(profile_dir)), 2)
+            self.assertNotIsInstance(response.streaming_content, list)
+            self.assertTrue(b''.join(response.streaming_content))
+
+    def test_max_dumps(self):
+        url = '/api/recipes/?limit=1'
+        with tempfile.TemporaryDirectory() as profile_dir:
+            with self.settings(
+                PROFILE_DIR=profile_dir, PROFILE_INTERVAL=0,
+                PROFILE_SAMPLE_RATE=1, PROFILE_MAX_DUMPS=2
+            ):
+                stale = os.path.join(profile_dir, '20000101-000000-0.sql')
+                open(stale, 'w').close()
+                for _ in range(3):
+                    self.client.get(url)
+            self.assertFalse(os.path.exists(stale))
+            self.assertEqual(len(os.listdir(profile_dir)), 4)
+
+    def test_hide_sensitive(self):
+        for sql in (
+            'UPDATE "auth_user" SET "password" = %s WHERE "id" = %s',
+            'SELECT "authtoken_token"."key" FROM "authtoken_token"',
+        ):
+            with self.subTest(sql=sql):
+                self.assertTrue(
+                    SQLRecorder.hide_sensitive(sql).endswith('скрыт')
+                )
+        sql = 'SELECT "auth_user"."username" FROM "auth_user"'
+        self.assertEqual(SQLRecorder.hide_sensitive(sql), sql)
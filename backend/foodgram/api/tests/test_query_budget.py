@@ -0,0 +1,181 @@
+import tempfile
+
+from api.tests.base import FoodgramTestCase
+from recipes.models import Ingredient, IngredientRecipe, User
+from recipes.trending import update_trends
+
+
+class QueryBudgetTestCase(FoodgramTestCase):
+    def test_recipes_list(self):
+        self.assert_constant_queries(4, (
+            '/api/recipes/?limit=1',
+            '/api/recipes/?limit=6',
+            '/api/recipes/?limit=50',
+        ))
+
+    def test_recipes_list_cursor(self):
+        self.assert_constant_queries(3, (
+            '/api/recipes/?cursor&limit=1',
+            '/api/recipes/?cursor&limit=50',
+            '/api/recipes/?cursor=eyJ2IjogWzEwMF0sICJyIjogZmFsc2V9&limit=50',
+        ))
+
+    def test_recipes_list_filtered(self):
+        filters = (
+            f'tags={self.tags[0].slug}&is_favorited=1',
+            'is_in_shopping_cart=1',
+            f'author={self.authors[0].id}',
+            'search=рецепты автора',
+        )
+        for query in filters:
+            with self.subTest(query=query):
+                self.assert_constant_queries(5, (
+                    f'/api/recipes/?{query}&limit=1',
+                    f'/api/recipes/?{query}&limit=50',
+                ))
+
+    def test_recipes_list_anonymous(self):
+        self.client.force_authenticate(None)
+        self.assert_constant_queries(4, (
+            '/api/recipes/?limit=1',
+            '/api/recipes/?limit=50',
+        ))
+
+    def test_recipe_detail(self):
+        self.assert_query_budget(3, 'get', f'/api/recipes/{self.recipe.id}/')
+
+    def test_feed(self):
+        self.assert_constant_queries(5, (
+            '/api/recipes/feed/?limit=1',
+            '/api/recipes/feed/?limit=6',
+            '/api/recipes/feed/?limit=50',
+        ))
+
+    def test_trending(self):
+        update_trends()
+        self.assert_constant_queries(4, (
+            '/api/recipes/trending/?limit=1',
+            '/api/recipes/trending/?limit=6',
+            '/api/recipes/trending/?limit=50',
+        ))
+
+    def test_subscriptions(self):
+        self.assert_constant_queries(4, (
+            '/api/users/subscriptions/?limit=1',
+            '/api/users/subscriptions/?limit=6',
+            '/api/users/subscriptions/?limit=50&recipes_limit=1',
+            '/api/users/subscriptions/?limit=50&recipes_limit=10',
+        ))
+
+    def test_subscribe(self):
+        url = f'/api/users/{self.authors[0].id}/subscribe/'
+        self.assert_query_budget(15, 'post', url + '?recipes_limit=10', 201)
+        self.assert_query_budget(8, 'delete', url, 204)
+
+    def test_favorite(self):
+        url = f'/api/recipes/{self.recipe.id}/favorite/'
+        self.assert_query_budget(6, 'delete', url, 204)
+        self.assert_query_budget(6, 'post', url, 201)
+
+    def test_shopping_cart(self):
+        url = f'/api/recipes/{self.recipe.id}/shopping_cart/'
+        self.assert_query_budget(12, 'delete', url, 204)
+        self.assert_query_budget(12, 'post', url, 201)
+
+    def test_recipe_write(self):
+        self.client.force_authenticate(self.authors[0])
+        url = f'/api/recipes/{self.recipe.id}/'
+        with tempfile.TemporaryDirectory() as media_root:
+            with self.settings(MEDIA_ROOT=media_root):
+                self.client.patch(url, self.recipe_data(1), format='json')
+                for method, url, status, sizes in (
+                    ('post', '/api/recipes/', 201, (1, 10, 50)),
+                    ('patch', url, 200, (10, 50, 100)),
+                ):
+                    with self.subTest(method=method):
+                        counts = {
+                            size: self.assert_query_budget(
+                                30, method, url, status,
+                                data=self.recipe_data(size)
+                            ) for size in sizes
+                        }
+                        self.assertEqual(
+                            len(set(counts.values())), 1, counts
+                        )
+
+    def test_recipe_partial_update(self):
+        self.client.force_authenticate(self.authors[0])
+        url = f'/api/recipes/{self.recipe.id}/'
+        items = list(IngredientRecipe.objects.filter(
+            recipe=self.recipe
+        ).order_by('id'))
+        self.assert_query_budget(
+            16, 'patch', url, data={'text': 'Новое описание'}
+        )
+        added = Ingredient.objects.exclude(
+            id__in=[item.ingredient_id for item in items]
+        ).first()
+        self.assert_query_budget(30, 'patch', url, data={'ingredients': [
+            {'id': items[0].ingredient_id, 'amount': items[0].amount},
+            {'id': items[1].ingredient_id, 'amount': items[1].amount + 1},
+            {'id': added.id, 'amount': 1},
+        ] + [
+            {'id': item.ingredient_id, 'amount': item.amount}
+            for item in items[3:]
+        ]})
+
+    def test_admin(self):
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@foodgram.ru', password='pass'
+        )
+        self.client.force_login(admin)
+        self.assert_constant_queries(12, (
+            '/admin/recipes/recipe/',
+            '/admin/recipes/recipe/?q=рецепт',
+            f'/admin/recipes/recipe/?tags__id__exact={self.tags[0].id}',
+        ))
+        for url in (
+            '/admin/recipes/ingredientrecipe/',
+            '/admin/recipes/favorite/',
+            '/admin/recipes/follow/',
+        ):
+            with self.subTest(url=url):
+                self.assert_query_budget(10, 'get', url)
+
+    def test_download_shopping_cart(self):
+        for file_format in ('txt', 'csv', 'json'):
+            with self.subTest(file_format=file_format):
+                self.assert_query_budget(
+                    1, 'get',
+                    '/api/recipes/download_shopping_cart/'
+                    f'?format={file_format}'
+                )
+
+    def test_ingredients(self):
+        self.assert_query_budget(1, 'get', '/api/ingredients/?name=а')
+        self.assert_constant_queries(0, (
+            '/api/ingredients/?name=а',
+            '/api/ingredients/?name=абрикос',
+        ))
+        self.assert_query_budget(1, 'get', '/api/ingredients/1/')
+
+    def test_tags(self):
+        self.assert_query_budget(1, 'get', '/api/tags/')
+        self.assert_query_budget(1, 'get', f'/api/tags/{self.tags[0].id}/')
+
+    def test_reference(self):
+        self.assert_query_budget(2, 'get', '/api/reference/')
+        self.assert_query_budget(0, 'get', '/api/reference/')
+
+    def test_users(self):
+        self.assert_constant_queries(2, (
+            '/api/users/?limit=1',
+            '/api/users/?limit=6',
+            '/api/users/?limit=50',
+        ))
+        self.assert_constant_queries(1, (
+            '/api/users/?cursor&limit=1',
+            '/api/users/?cursor&limit=50',
+        ))
+        self.assert_query_budget(1, 'get', '/api/users/me/')
+        self.assert_query_budget(1, 'get', f'/api/users/{self.authors[0].id}/')
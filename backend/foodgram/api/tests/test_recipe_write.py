@@ -0,0 +1,56 @@
+from api.tests.base import FoodgramTestCase
+from recipes.models import Ingredient, IngredientRecipe
+
+
+class RecipeWriteTestCase(FoodgramTestCase):
+    def test_ingredient_errors(self):
+        data = self.recipe_data(2)
+        ingredient_id = data['ingredients'][0]['id']
+        data['ingredients'] += [
+            {'id': ingredient_id, 'amount': 1},
+            {'id': 0, 'amount': 1},
+            {'id': -1, 'amount': 0},
+        ]
+        response = self.client.post('/api/recipes/', data, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.data['non_field_errors']), 3)
+        self.assertIn('0, -1', response.data['non_field_errors'][1])
+
+    def test_partial_update_keeps_rows(self):
+        self.client.force_authenticate(self.authors[0])
+        url = f'/api/recipes/{self.recipe.id}/'
+        items = list(IngredientRecipe.objects.filter(
+            recipe=self.recipe
+        ).order_by('id'))
+        response = self.client.patch(
+            url, {'text': 'Новое описание'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(IngredientRecipe.objects.filter(
+            recipe=self.recipe
+        ).order_by('id')), items)
+        self.assertEqual(self.recipe.tags.count(), 2)
+        kept, changed, removed = items[0], items[1], items[2]
+        added = Ingredient.objects.exclude(
+            id__in=[item.ingredient_id for item in items]
+        ).first()
+        response = self.client.patch(url, {'ingredients': [
+            {'id': kept.ingredient_id, 'amount': kept.amount},
+            {'id': changed.ingredient_id, 'amount': changed.amount + 1},
+            {'id': added.id, 'amount': 1},
+        ] + [
+            {'id': item.ingredient_id, 'amount': item.amount}
+            for item in items[3:]
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        current = {
+            item.ingredient_id: item
+            for item in IngredientRecipe.objects.filter(recipe=self.recipe)
+        }
+        self.assertNotIn(removed.ingredient_id, current)
+        self.assertEqual(current[kept.ingredient_id].id, kept.id)
+        self.assertEqual(current[changed.ingredient_id].id, changed.id)
+        self.assertEqual(
+            current[changed.ingredient_id].amount, changed.amount + 1
+        )
+        self.assertEqual(current[added.id].amount, 1)
@@ -0,0 +1,88 @@
+import gzip
+import json
+
+import brotli
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Tag
+
+URL = '/api/reference/'
+
+
+class ReferenceTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Tag.objects.create(name='Завтрак', color='#E26C2D', slug='breakfast')
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f'Ингредиент {i}', measurement_unit='г')
+            for i in range(100)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def get(self, encoding='', **headers):
+        return self.client.get(URL, HTTP_ACCEPT_ENCODING=encoding, **headers)
+
+    def test_payload(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Encoding', response)
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        payload = json.loads(response.content)
+        self.assertEqual(payload['tags'][0]['slug'], 'breakfast')
+        self.assertEqual(len(payload['ingredients']), 100)
+        self.assertEqual(
+            set(payload['ingredients'][0]), {'id', 'name', 'measurement_unit'}
+        )
+
+    def test_content_encoding(self):
+        identity = self.get().content
+        for accept, encoding, decompress in (
+            ('gzip, deflate, br', 'br', brotli.decompress),
+            ('gzip', 'gzip', gzip.decompress),
+            ('br;q=0.0, gzip', 'gzip', gzip.decompress),
+            ('BR; q=0.5', 'br', brotli.decompress),
+        ):
+            with self.subTest(accept=accept):
+                response = self.get(accept)
+                self.assertEqual(response['Content-Encoding'], encoding)
+                self.assertIn('Accept-Encoding', response['Vary'])
+                self.assertEqual(decompress(response.content), identity)
+        for accept in ('br;q=0.000, gzip;q=0', 'gzip;q=abc', 'deflate'):
+            with self.subTest(accept=accept):
+                response = self.get(accept)
+                self.assertNotIn('Content-Encoding', response)
+                self.assertEqual(response.content, identity)
+        self.assertEqual(self.get('gzip').content, self.get('gzip').content)
+
+    def test_etag(self):
+        response = self.get('gzip')
+        etag = response['ETag']
+        self.assertNotEqual(etag, self.get()['ETag'])
+        for if_none_match in (etag, f'W/{etag}', f'"other", {etag}', '*'):
+            with self.subTest(if_none_match=if_none_match):
+                response = self.get('gzip', HTTP_IF_NONE_MATCH=if_none_match)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+                self.assertEqual(response['ETag'], etag)
+        self.assertEqual(
+            self.get('br', HTTP_IF_NONE_MATCH=etag).status_code, 200
+        )
+        Ingredient.objects.create(name='Соль', measurement_unit='г')
+        response = self.get('gzip', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_versioned_url(self):
+        version = self.get()['X-Reference-Version']
+        response = self.client.get(URL, {'version': version})
+        self.assertEqual(
+            response['Cache-Control'], 'public, max-age=31536000, immutable'
+        )
+        response = self.client.get(URL, {'version': 'stale'})
+        self.assertEqual(response['Cache-Control'], 'no-cache')
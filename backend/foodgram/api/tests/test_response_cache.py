@@ -0,0 +1,95 @@
+from unittest import mock
+
+from django.core.cache import cache
+
+from api.cache import single_flight
+from api.tests.base import INGREDIENTS_PER_RECIPE, FoodgramTestCase
+from recipes.models import IngredientRecipe, Recipe, User
+
+
+class ResponseCacheTestCase(FoodgramTestCase):
+    def test_invalidation(self):
+        self.client.force_authenticate(None)
+        recipe_url = f'/api/recipes/{self.recipe.id}/'
+        list_url = f'/api/recipes/?limit=6&tags={self.tags[0].slug}&page=2'
+        for url in (list_url, recipe_url, '/api/tags/'):
+            with self.subTest(url=url):
+                self.client.get(url)
+                self.assert_query_budget(0, 'get', url)
+        self.assert_query_budget(
+            0, 'get', f'/api/recipes/?page=2&tags={self.tags[0].slug}&limit=6'
+        )
+        url = '/api/recipes/?ordering=-favorites_count'
+        self.client.get(url)
+        self.assertGreater(self.assert_query_budget(4, 'get', url), 0)
+
+        recipe = Recipe.objects.get(id=self.recipe.id)
+        recipe.name = 'Новое название'
+        recipe.save()
+        self.assertEqual(
+            self.client.get(recipe_url).json()['name'], 'Новое название'
+        )
+        author = recipe.author
+        author.save(update_fields=['last_login'])
+        self.assert_query_budget(0, 'get', recipe_url)
+        author.first_name = 'Автор'
+        author.save()
+        self.assertEqual(
+            self.client.get(recipe_url).json()['author']['first_name'], 'Автор'
+        )
+        IngredientRecipe.objects.filter(recipe=recipe).first().delete()
+        self.assertEqual(
+            len(self.client.get(recipe_url).json()['ingredients']),
+            INGREDIENTS_PER_RECIPE - 1
+        )
+        tag = self.tags[0]
+        tag.name = 'Новый тег'
+        tag.save()
+        self.assertEqual(
+            self.client.get('/api/tags/').json()[0]['name'], 'Новый тег'
+        )
+        self.assertEqual(
+            self.client.get(recipe_url).json()['tags'][0]['name'], 'Новый тег'
+        )
+
+        self.client.force_authenticate(self.user)
+        self.client.get(recipe_url)
+        self.assertGreater(self.assert_query_budget(3, 'get', recipe_url), 0)
+
+    def test_single_flight(self):
+        compute = mock.Mock(return_value=('value', True))
+        self.assertEqual(single_flight('key', compute, 60), 'value')
+        self.assertEqual(single_flight('key', compute, 60), 'value')
+        self.assertEqual(compute.call_count, 1)
+        cache.add('other:lock', 1)
+        compute.return_value = ('other', True)
+        with mock.patch('api.cache.RESPONSE_LOCK_WAIT', 0):
+            self.assertEqual(single_flight('other', compute, 60), 'other')
+        self.assertIsNone(cache.get('other'))
+
+    def test_host_and_scheme(self):
+        self.client.force_authenticate(None)
+        url = '/api/recipes/?limit=1'
+        for host, secure in (
+            ('testserver', False), ('localhost', False), ('localhost', True)
+        ):
+            with self.subTest(host=host, secure=secure):
+                scheme = 'https' if secure else 'http'
+                self.assertTrue(self.client.get(
+                    url, HTTP_HOST=host, secure=secure
+                ).json()['next'].startswith(f'{scheme}://{host}/'))
+
+    def test_user_saves_without_author_changes(self):
+        self.client.force_authenticate(None)
+        url = f'/api/recipes/{self.recipe.id}/'
+        self.client.get(url)
+        User.objects.create_user(
+            username='new', email='new@foodgram.ru', password='pass'
+        )
+        self.assert_query_budget(0, 'get', url)
+        author = User.objects.get(id=self.recipe.author_id)
+        author.set_password('new-pass')
+        author.save()
+        self.assert_query_budget(0, 'get', url)
+        author.save(update_fields=['first_name', 'last_name'])
+        self.assert_query_budget(0, 'get', url)
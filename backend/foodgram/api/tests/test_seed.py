@@ -0,0 +1,91 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import F, Sum
+from django.test import TestCase
+
+from recipes.models import (
+    Favorite, Follow, Ingredient, IngredientRecipe, Recipe, RecipeTag,
+    ShoppingCart, ShoppingListItem, Tag, TimelineEntry, User, UserStats
+)
+from recipes.search import (
+    get_search_backend, recipe_documents, weigh_terms
+)
+
+
+class SeedTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'seed_foodgram', users=20, recipes=60, follows=80, favorites=100,
+            carts=60, min_ingredients=2, max_ingredients=5, batch_size=25,
+            stdout=StringIO()
+        )
+
+    def test_rows(self):
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Recipe.objects.count(), 60)
+        self.assertEqual(Tag.objects.count(), 3)
+        self.assertTrue(Ingredient.objects.exists())
+        self.assertGreaterEqual(RecipeTag.objects.count(), 60)
+        self.assertTrue(
+            120 <= IngredientRecipe.objects.count() <= 300
+        )
+        for model, limit in ((Follow, 80), (Favorite, 100),
+                             (ShoppingCart, 60)):
+            with self.subTest(model=model.__name__):
+                self.assertTrue(0 < model.objects.count() <= limit)
+        self.assertFalse(Follow.objects.filter(
+            follower=F('author')
+        ).exists())
+
+    def test_counters(self):
+        self.assertEqual(
+            Recipe.objects.aggregate(total=Sum('favorites_count'))['total'],
+            Favorite.objects.count()
+        )
+        self.assertEqual(
+            Recipe.objects.aggregate(total=Sum('in_carts_count'))['total'],
+            ShoppingCart.objects.count()
+        )
+        self.assertEqual(
+            UserStats.objects.aggregate(total=Sum('followers_count'))['total'],
+            Follow.objects.count()
+        )
+
+    def test_shopping_lists(self):
+        totals = {
+            (user, ingredient): amount
+            for user, ingredient, amount in IngredientRecipe.objects.filter(
+                recipe__shopping_cart__isnull=False
+            ).values_list(
+                'recipe__shopping_cart__user', 'ingredient'
+            ).annotate(Sum('amount')).order_by()
+        }
+        self.assertTrue(totals)
+        self.assertEqual({
+            (item.user_id, item.ingredient_id): item.total_amount
+            for item in ShoppingListItem.objects.all()
+        }, totals)
+
+    def test_timelines(self):
+        expected = set(Recipe.objects.filter(
+            author__following__isnull=False
+        ).values_list('author__following__follower', 'id'))
+        self.assertTrue(expected)
+        self.assertEqual(
+            set(TimelineEntry.objects.values_list('user', 'recipe')),
+            expected
+        )
+
+    def test_search_index(self):
+        found = get_search_backend().search(Recipe.objects.all(), 'суп')
+        self.assertTrue(found.exists())
+        for name, text in found.values_list('name', 'text'):
+            self.assertIn('суп', f'{name} {text}'.lower())
+        for recipe in Recipe.objects.order_by('?')[:5]:
+            with self.subTest(recipe=recipe.id):
+                self.assertEqual(
+                    dict(recipe.search_terms.values_list('term', 'weight')),
+                    weigh_terms(recipe_documents(recipe))
+                )
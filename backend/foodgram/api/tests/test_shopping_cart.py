@@ -0,0 +1,38 @@
+import json
+from csv import DictReader
+from io import StringIO
+
+from api.tests.base import FoodgramTestCase
+from recipes.models import ShoppingListItem
+
+URL = '/api/recipes/download_shopping_cart/'
+
+
+class ShoppingCartDownloadTestCase(FoodgramTestCase):
+    def download(self, query=''):
+        response = self.client.get(URL + query)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_formats(self):
+        items = ShoppingListItem.objects.filter(user=self.user)
+        response, content = self.download()
+        self.assertEqual(response['Content-Type'], 'text/plain; charset=utf-8')
+        self.assertEqual(len(content.splitlines()), items.count() + 2)
+        response, content = self.download('?format=csv')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(DictReader(StringIO(content)))
+        self.assertEqual(len(rows), items.count())
+        self.assertEqual(
+            [row['name'] for row in rows], sorted(row['name'] for row in rows)
+        )
+        response, content = self.download('?format=json')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(len(json.loads(content)), items.count())
+
+    def test_errors(self):
+        self.assertEqual(self.client.get(URL + '?format=pdf').status_code, 404)
+        self.client.force_authenticate(None)
+        response = self.client.get(URL + '?format=csv')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertTrue(response.content.decode().startswith('detail: '))
@@ -0,0 +1,100 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from recipes.models import Ingredient, IngredientRecipe, Recipe, User
+
+LOGGER = 'recipes.management.commands.sync_ingredients'
+
+
+class SyncIngredientsTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, rows):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as data_file:
+            if name.endswith('.json'):
+                json.dump([
+                    {'name': name, 'measurement_unit': unit}
+                    for name, unit in rows
+                ], data_file, ensure_ascii=False)
+            else:
+                data_file.write('name,unit\n')
+                data_file.writelines(
+                    f'{name},{unit}\n' for name, unit in rows
+                )
+        return path
+
+    def sync(self, path, **options):
+        with self.assertLogs(LOGGER, 'INFO') as logs:
+            call_command('sync_ingredients', path, stdout=StringIO(),
+                         **options)
+        return '\n'.join(record.getMessage() for record in logs.records)
+
+    def catalog(self):
+        return list(Ingredient.objects.order_by('id').values_list(
+            'id', 'name', 'measurement_unit'
+        ))
+
+    def test_idempotent(self):
+        rows = [
+            ('Соль', 'г'), ('  соль ', 'Г'), ('Перец  черный', 'г'),
+            ('Молоко', 'мл'), ('', 'г'),
+        ]
+        for name in ('ingredients.csv', 'ingredients.json'):
+            with self.subTest(name=name):
+                Ingredient.objects.all().delete()
+                path = self.write(name, rows)
+                self.assertIn(
+                    'Ingredients created: 3, updated: 0, '
+                    'duplicates skipped: 2', self.sync(path)
+                )
+                catalog = self.catalog()
+                self.assertEqual(
+                    [row[1:] for row in catalog],
+                    [('Соль', 'г'), ('Перец черный', 'г'), ('Молоко', 'мл')]
+                )
+                self.assertIn(
+                    'Ingredients created: 0, updated: 0', self.sync(path)
+                )
+                self.assertEqual(self.catalog(), catalog)
+
+    def test_modified_unit(self):
+        salt = Ingredient.objects.create(name='соль', measurement_unit='Г')
+        sugar = Ingredient.objects.create(name='Сахар', measurement_unit='г')
+        flour = Ingredient.objects.create(name='Мука', measurement_unit='г')
+        author = User.objects.create_user(
+            username='author', email='author@foodgram.ru', password='pass'
+        )
+        recipe = Recipe.objects.create(
+            author=author, name='Пирог', text='Описание', cooking_time=10,
+            image='recipes/image.png'
+        )
+        IngredientRecipe.objects.create(
+            recipe=recipe, ingredient=sugar, amount=100
+        )
+        path = self.write('ingredients.csv', [
+            ('Соль', 'г'), ('Сахар', 'кг'), ('Мука', 'кг'),
+        ])
+        report = self.sync(path, delete_missing=True)
+        self.assertIn('Ingredients created: 2, updated: 1', report)
+        self.assertIn(
+            'Ingredients deleted: 1, kept because used in recipes: 1', report
+        )
+        salt.refresh_from_db()
+        self.assertEqual((salt.name, salt.measurement_unit), ('Соль', 'г'))
+        self.assertFalse(Ingredient.objects.filter(id=flour.id).exists())
+        self.assertEqual(
+            set(Ingredient.objects.filter(name='Сахар').values_list(
+                'measurement_unit', flat=True
+            )), {'г', 'кг'}
+        )
+        self.assertIn(
+            'Ingredients created: 0, updated: 0', self.sync(path)
+        )
@@ -0,0 +1,26 @@
+from django.utils import timezone
+
+from api.tests.base import FoodgramTestCase
+from recipes.models import RecipeTrend
+from recipes.trending import HALF_LIFE, update_trends
+
+
+class TrendingTestCase(FoodgramTestCase):
+    def test_scores(self):
+        now = timezone.now()
+        update_trends(now=now)
+        response = self.client.get('/api/recipes/trending/?limit=50')
+        scores = [
+            RecipeTrend.objects.get(recipe=recipe['id']).score
+            for recipe in response.data['results']
+        ]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertEqual(scores[0], 3)
+        response = self.client.get(
+            f'/api/recipes/trending/?tags={self.tags[2].slug}'
+        )
+        self.assertEqual(response.data['count'], 0)
+        update_trends(now=now + HALF_LIFE)
+        self.assertEqual(
+            RecipeTrend.objects.get(recipe=self.recipe).score, 1.5
+        )
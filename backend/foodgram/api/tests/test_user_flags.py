@@ -0,0 +1,20 @@
+from api.tests.base import FoodgramTestCase
+
+
+class UserFlagsTestCase(FoodgramTestCase):
+    def test_flags_follow_changes(self):
+        url = f'/api/recipes/{self.recipe.id}/'
+        for action, field in (
+            ('favorite/', 'is_favorited'),
+            ('shopping_cart/', 'is_in_shopping_cart'),
+        ):
+            with self.subTest(action=action):
+                self.assertTrue(self.client.get(url).data[field])
+                self.client.delete(url + action)
+                self.assertFalse(self.client.get(url).data[field])
+                self.client.post(url + action)
+                self.assertTrue(self.client.get(url).data[field])
+        author_url = f'/api/users/{self.authors[1].id}/'
+        self.assertTrue(self.client.get(author_url).data['is_subscribed'])
+        self.client.delete(author_url + 'subscribe/')
+        self.assertFalse(self.client.get(author_url).data['is_subscribed'])
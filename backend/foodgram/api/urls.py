@@ -1,11 +1,14 @@
 from django.urls import include, path
 from rest_framework.routers import SimpleRouter
 
-from .views import (CustomUserViewSet, IngredientsViewSet, RecipesViewSet,
-                    TagsViewSet)
+from .views import (CustomUserViewSet, IngredientsViewSet, MetricsView,
+                    RecipesViewSet, ReferenceView, TagsViewSet)
 
 router = SimpleRouter()
 
+router.register(
+    'users', CustomUserViewSet, basename='users'
+)
 router.register(
     'tags', TagsViewSet, basename='tags'
 )
@@ -17,6 +20,8 @@ router.register(
 )
 
 urlpatterns = [
+    path('reference/', ReferenceView.as_view()),
+    path('_metrics', MetricsView.as_view()),
     path('users/subscriptions/', CustomUserViewSet.as_view(
         {'get': 'subscriptions', }
     )),
@@ -1,8 +1,52 @@
-def create_shopping_list(ingredients):
-    shopping_list = 'Список покупок \n\n'
+import csv
+import json
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def shopping_list_txt(ingredients):
+    yield 'Список покупок \n\n'
     for ingredient in ingredients:
-        shopping_list += (
+        yield (
             f"{ingredient['ingredient__name']} "
             f"({ingredient['ingredient__measurement_unit']}) - "
-            f"{ingredient['amount__sum']}\n")
-    return shopping_list
+            f"{ingredient['total_amount']}\n")
+
+
+def shopping_list_csv(ingredients):
+    writer = csv.writer(Echo())
+    yield writer.writerow(('name', 'measurement_unit', 'amount'))
+    for ingredient in ingredients:
+        yield writer.writerow((
+            ingredient['ingredient__name'],
+            ingredient['ingredient__measurement_unit'],
+            ingredient['total_amount']
+        ))
+
+
+def shopping_list_json(ingredients):
+    separator = ''
+    yield '['
+    for ingredient in ingredients:
+        yield separator + json.dumps({
+            'name': ingredient['ingredient__name'],
+            'measurement_unit': ingredient['ingredient__measurement_unit'],
+            'amount': ingredient['total_amount']
+        }, ensure_ascii=False)
+        separator = ','
+    yield ']'
+
+
+SHOPPING_LIST_FORMATS = {
+    'txt': (shopping_list_txt, 'text/plain; charset=utf-8'),
+    'csv': (shopping_list_csv, 'text/csv; charset=utf-8'),
+    'json': (shopping_list_json, 'application/json'),
+}
+
+
+def create_shopping_list(ingredients, file_format='txt'):
+    writer, content_type = SHOPPING_LIST_FORMATS[file_format]
+    return writer(ingredients), content_type
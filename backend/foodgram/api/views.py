@@ -1,34 +1,67 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    BooleanField, F, Prefetch, Value, Window
+)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce, RowNumber
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.filters import OrderingFilter
+from rest_framework.parsers import FileUploadParser, MultiPartParser
+from rest_framework.permissions import (
+    AllowAny, IsAdminUser, IsAuthenticated
+)
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from .filters import RecipeFilter, IngredientFilter
+from .cache import (
+    INGREDIENTS_VERSION_KEY, RECIPES_VERSION_KEY, TAGS_VERSION_KEY,
+    invalidate_user_flags
+)
+from .fields import validate_image_header
+from .filters import RecipeFilter
+from .ingredient_index import ingredient_index
+from .metrics import metrics
+from .middleware import serializing
+from .mixins import AnonymousCacheMixin, SerializingMixin
+from recipes.feed import backfill_timeline, feed_filter, prune_timeline
 from recipes.models import (
-    Favorite, Follow, Ingredient, IngredientRecipe,
-    Recipe, ShoppingCart, Tag, User
+    Favorite, Follow, ImageUpload, Ingredient, IngredientRecipe,
+    Recipe, ShoppingCart, ShoppingListItem, Tag, User, UserStats
 )
+from .paginators import CursorPagination
 from .permissions import IsAuthorOrReadOnly
+from .readers import (
+    CROP_COLUMNS, RECIPE_COLUMNS, USER_COLUMNS, Reader, ordered_values
+)
+from .reference import reference_bundle
+from .renderers import CsvShoppingListRenderer, TxtShoppingListRenderer
 from .serializers import (
     CropRecipeSerializer, FollowSerializer, IngredientSerializer,
-    RecipeGetSerializer, RecipeSerializer, TagSerializer,
-    UserCreateProfileSerializer, UserProfileSerializer
+    RecipeGetSerializer, RecipeSerializer, TagSerializer
 )
 from .utils import create_shopping_list
 
 
-class CustomUserViewSet(UserViewSet):
-    queryset = User.objects.all()
+class CustomUserViewSet(SerializingMixin, UserViewSet):
+    queryset = User.objects.order_by('id')
 
-    def get_serializer_class(self):
-        if self.request.method == 'GET':
-            return UserProfileSerializer
-        return UserCreateProfileSerializer
+    def list(self, request, *args, **kwargs):
+        if not settings.FAST_READ_PATH:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(ordered_values(queryset, USER_COLUMNS))
+        with serializing(request):
+            data = Reader(request).users(page)
+        return self.get_paginated_response(data)
 
     @action(
         detail=False,
@@ -36,14 +69,58 @@ class CustomUserViewSet(UserViewSet):
         permission_classes=(IsAuthenticated,)
     )
     def subscriptions(self, request):
-        queryset = User.objects.filter(following__follower=self.request.user)
+        queryset = User.objects.filter(
+            following__follower=self.request.user
+        ).annotate(
+            recipes_count=Coalesce(F('stats__recipes_count'), 0),
+            is_subscribed=Value(True, output_field=BooleanField())
+        ).order_by('id')
+        limit = request.query_params.get('recipes_limit')
+        if settings.FAST_READ_PATH:
+            pages = self.paginate_queryset(ordered_values(
+                queryset, (*USER_COLUMNS, 'is_subscribed', 'recipes_count')
+            ))
+            recipes = self._get_authors_recipes(
+                [author['id'] for author in pages], limit
+            ).values(*CROP_COLUMNS)
+            with serializing(request):
+                data = Reader(request).subscriptions(pages, recipes)
+            return self.get_paginated_response(data)
         pages = self.paginate_queryset(queryset)
+        authors_recipes = defaultdict(list)
+        for recipe in self._get_authors_recipes(
+            [author.id for author in pages], limit
+        ).only(*CROP_COLUMNS):
+            authors_recipes[recipe.author_id].append(recipe)
         serializer = FollowSerializer(
             pages,
             many=True,
-            context={'request': request}
+            context={'request': request, 'recipes': authors_recipes}
         )
-        return self.get_paginated_response(serializer.data)
+        with serializing(request):
+            data = serializer.data
+        return self.get_paginated_response(data)
+
+    @staticmethod
+    def _get_authors_recipes(authors, limit):
+        if not authors:
+            return Recipe.objects.none()
+        recipes = Recipe.objects.filter(author__in=authors)
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            return recipes
+        sql, params = recipes.annotate(
+            row_number=Window(
+                expression=RowNumber(),
+                partition_by=F('author'),
+                order_by=F('id').desc()
+            )
+        ).values('id', 'row_number').order_by().query.sql_with_params()
+        return Recipe.objects.filter(id__in=RawSQL(
+            f'SELECT id FROM ({sql}) ranked WHERE row_number <= %s',
+            (*params, limit)
+        ))
 
     @action(
         detail=True,
@@ -59,74 +136,275 @@ class CustomUserViewSet(UserViewSet):
         )
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        author_stats = UserStats.objects.filter(user=author)
         if request.method == 'POST':
-            Follow.objects.create(
+            with transaction.atomic():
+                Follow.objects.create(
+                    follower=request.user,
+                    author=author,
+                )
+                author_stats.increment('followers_count')
+                backfill_timeline(request.user, author)
+                invalidate_user_flags(request.user.id)
+            with serializing(request):
+                data = serializer.data
+            return Response(data, status=status.HTTP_201_CREATED)
+        with transaction.atomic():
+            deleted, _ = Follow.objects.filter(
                 follower=request.user,
                 author=author,
-            )
-            return Response(
-                serializer.data,
-                status=status.HTTP_201_CREATED
-            )
-        Follow.objects.filter(
-            follower=request.user,
-            author=author,
-        ).delete()
+            ).delete()
+            if deleted:
+                author_stats.increment('followers_count', -deleted)
+                prune_timeline(request.user, author)
+                invalidate_user_flags(request.user.id)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class TagsViewSet(viewsets.ReadOnlyModelViewSet):
+class TagsViewSet(AnonymousCacheMixin, SerializingMixin,
+                  viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
+    response_cache_versions = (TAGS_VERSION_KEY,)
+
+
+class ReferenceView(APIView):
+    authentication_classes = ()
+    permission_classes = (AllowAny,)
+    encodings = ('br', 'gzip')
+
+    @staticmethod
+    def get_quality(params):
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    return float(value)
+                except ValueError:
+                    return 0
+        return 1
+
+    def get_encoding(self, request, available):
+        accepted = {}
+        for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+            coding, _, params = item.partition(';')
+            accepted[coding.strip().lower()] = self.get_quality(params) > 0
+        return next(
+            (encoding for encoding in self.encodings
+             if encoding in available and accepted.get(encoding)),
+            'identity'
+        )
+
+    def get(self, request):
+        digest, encodings = reference_bundle.get()
+        encoding = self.get_encoding(request, encodings)
+        etag = f'"{digest}"' if encoding == 'identity' else (
+            f'"{digest}-{encoding}"'
+        )
+        if request.query_params.get('version') == digest:
+            cache_control = 'public, max-age=31536000, immutable'
+        else:
+            cache_control = 'no-cache'
+        if_none_match = {
+            tag.strip().replace('W/', '', 1) for tag in
+            request.META.get('HTTP_IF_NONE_MATCH', '').split(',')
+        }
+        if etag in if_none_match or '*' in if_none_match:
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = HttpResponse(
+                encodings[encoding],
+                content_type='application/json'
+            )
+            if encoding != 'identity':
+                response['Content-Encoding'] = encoding
+        response['ETag'] = etag
+        response['Cache-Control'] = cache_control
+        response['Vary'] = 'Accept-Encoding'
+        response['X-Reference-Version'] = digest
+        return response
+
+
+class MetricsView(APIView):
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return HttpResponse(
+            metrics.render(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
 
 
-class IngredientsViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientsViewSet(SerializingMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
-    filter_backends = (IngredientFilter,)
-    search_fields = ('^name',)
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if name:
+            return Response(ingredient_index.search(name))
+        return super().list(request, *args, **kwargs)
 
-class RecipesViewSet(viewsets.ModelViewSet):
+
+class RecipesViewSet(AnonymousCacheMixin, SerializingMixin,
+                     viewsets.ModelViewSet):
     permission_classes = (IsAuthorOrReadOnly,)
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, OrderingFilter)
     filterset_class = RecipeFilter
+    ordering_fields = ('id', 'favorites_count', 'in_carts_count')
     queryset = Recipe.objects.all()
+    response_cache_versions = (
+        RECIPES_VERSION_KEY, TAGS_VERSION_KEY, INGREDIENTS_VERSION_KEY
+    )
+    counters = {
+        Favorite: 'favorites_count',
+        ShoppingCart: 'in_carts_count',
+    }
+
+    def get_queryset(self):
+        return Recipe.objects.select_related('author').prefetch_related(
+            'tags',
+            Prefetch(
+                'ingredientrecipe_set',
+                queryset=IngredientRecipe.objects.select_related(
+                    'ingredient'
+                ).order_by('id')
+            )
+        )
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
             return RecipeGetSerializer
         return RecipeSerializer
 
+    def list_response(self, queryset):
+        queryset = self.filter_queryset(queryset)
+        if settings.FAST_READ_PATH:
+            page = self.paginate_queryset(
+                ordered_values(queryset, RECIPE_COLUMNS)
+            )
+            with serializing(self.request):
+                data = Reader(self.request).recipes(page)
+            return self.get_paginated_response(data)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        with serializing(self.request):
+            data = serializer.data
+        return self.get_paginated_response(data)
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            lambda request: self.list_response(self.get_queryset()), request
+        )
+
+    def is_response_cacheable(self, request):
+        # Счетчики меняются без сигналов, сортировка по ним не кэшируется.
+        ordering = request.query_params.get('ordering', '')
+        return super().is_response_cacheable(request) and not any(
+            field in ordering for field in self.counters.values()
+        )
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        users = list(instance.shopping_cart.values_list('user', flat=True))
+        ingredients = list(instance.ingredients.values_list('id', flat=True))
+        instance.delete()
+        UserStats.objects.filter(user=instance.author_id).increment(
+            'recipes_count', -1
+        )
+        if users:
+            ShoppingListItem.objects.refresh(
+                users=users, ingredients=ingredients
+            )
+
     @action(
         detail=False,
         methods=['GET'],
-        permission_classes=(IsAuthenticated,)
+        permission_classes=(IsAuthenticated,),
+        pagination_class=CursorPagination
+    )
+    def feed(self, request):
+        return self.list_response(
+            self.get_queryset().filter(feed_filter(request.user))
+        )
+
+    @action(detail=False, methods=['GET'])
+    def trending(self, request):
+        return self.list_response(
+            self.get_queryset().filter(
+                trend__isnull=False
+            ).select_related('trend').order_by('-trend__score', '-id')
+        )
+
+    @action(
+        detail=False,
+        methods=['GET'],
+        permission_classes=(IsAuthenticated,),
+        renderer_classes=(
+            JSONRenderer, TxtShoppingListRenderer, CsvShoppingListRenderer
+        )
     )
     def download_shopping_cart(self, request):
-        ingredients = IngredientRecipe.objects.filter(
-            recipe__shopping_cart__user=request.user
+        file_format = request.query_params.get('format', 'txt')
+        ingredients = ShoppingListItem.objects.filter(
+            user=request.user
         ).values(
+            'ingredient__name',
+            'ingredient__measurement_unit',
+            'total_amount'
+        ).order_by(
             'ingredient__name',
             'ingredient__measurement_unit'
-        ).annotate(Sum('amount'))
-        shopping_list = create_shopping_list(ingredients)
-        response = HttpResponse(
+        )
+        shopping_list, content_type = create_shopping_list(
+            ingredients.iterator(),
+            file_format
+        )
+        response = StreamingHttpResponse(
             shopping_list,
-            content_type='text/plain'
+            content_type=content_type
         )
         response['Content-Disposition'] = (
-            'attachment; filename="ShoppingCart.txt"'
+            f'attachment; filename="ShoppingCart.{file_format}"'
         )
         return response
 
+    @action(
+        detail=False,
+        methods=['POST'],
+        permission_classes=(IsAuthenticated,),
+        parser_classes=(MultiPartParser, FileUploadParser)
+    )
+    def images(self, request):
+        image = request.data.get('image') or request.data.get('file')
+        if image is None:
+            return Response(
+                {'errors': 'Необходимо передать картинку'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        upload = ImageUpload.objects.create(
+            user=request.user,
+            image=validate_image_header(image)
+        )
+        return Response(
+            {'token': str(upload.token)},
+            status=status.HTTP_201_CREATED
+        )
+
     @staticmethod
-    def _post_delete_method(request, pk, model):
+    def _refresh_shopping_list(model, user, recipe):
+        if model is ShoppingCart:
+            ShoppingListItem.objects.refresh(
+                users=[user.id],
+                ingredients=recipe.ingredients.values('id')
+            )
+
+    def _post_delete_method(self, request, pk, model):
         recipe = get_object_or_404(Recipe, id=pk)
         if request.method == 'POST':
             if model.objects.filter(
@@ -137,26 +415,38 @@ class RecipesViewSet(viewsets.ModelViewSet):
                     {'Рецепт уже добавлен'},
                     status=status.HTTP_404_NOT_FOUND
                 )
-            model.objects.create(
-                user=request.user,
-                recipe=recipe,
-            )
+            with transaction.atomic():
+                model.objects.create(
+                    user=request.user,
+                    recipe=recipe,
+                )
+                Recipe.objects.filter(pk=recipe.pk).increment(
+                    self.counters[model]
+                )
+                invalidate_user_flags(request.user.id)
+                self._refresh_shopping_list(
+                    model, request.user, recipe
+                )
             serializer = CropRecipeSerializer(
                 recipe,
                 context={'request': request}
             )
-            return Response(
-                serializer.data,
-                status=status.HTTP_201_CREATED
-            )
-        if model.objects.filter(
-                user=request.user,
-                recipe=recipe,
-        ).exists():
-            model.objects.filter(
+            with serializing(request):
+                data = serializer.data
+            return Response(data, status=status.HTTP_201_CREATED)
+        with transaction.atomic():
+            deleted, _ = model.objects.filter(
                 user=request.user,
                 recipe=recipe,
             ).delete()
+            if deleted:
+                Recipe.objects.filter(pk=recipe.pk).increment(
+                    self.counters[model], -deleted
+                )
+                invalidate_user_flags(request.user.id)
+                self._refresh_shopping_list(
+                    model, request.user, recipe
+                )
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(
@@ -1,4 +1,5 @@
 import os
+import sys
 
 from dotenv import load_dotenv
 
@@ -24,11 +25,13 @@ INSTALLED_APPS = [
     'rest_framework.authtoken',
     'djoser',
     'django_filters',
+    'sorl.thumbnail',
     'api',
     'recipes'
 ]
 
 MIDDLEWARE = [
+    'api.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -36,6 +39,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.ProfileMiddleware',
 ]
 
 ROOT_URLCONF = 'foodgram.urls'
@@ -59,10 +63,21 @@ TEMPLATES = [
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
 
+# Тесты в CI запускаются без PostgreSQL.
+TESTING = sys.argv[1:2] == ['test']
+
 DATABASES = {
     'default': {
-        'ENGINE': os.getenv('DB_ENGINE'),
-        'NAME': os.getenv('DB_NAME'),
+        'ENGINE': os.getenv(
+            'DB_ENGINE',
+            default='django.db.backends.sqlite3' if TESTING
+            else 'django.db.backends.postgresql'
+        ),
+        'NAME': os.getenv(
+            'DB_NAME',
+            default=os.path.join(BASE_DIR, 'db.sqlite3') if TESTING
+            else 'postgres'
+        ),
         'USER': os.getenv('POSTGRES_USER'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
@@ -71,6 +86,19 @@ DATABASES = {
 }
 
 
+# Версии данных и кэш ответов должны быть общими для всех процессов gunicorn,
+# поэтому в продакшене кэш хранится в memcached.
+CACHE_LOCATION = os.getenv('CACHE_LOCATION')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': CACHE_LOCATION,
+    } if CACHE_LOCATION else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -104,6 +132,36 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Уменьшенные копии лежат рядом с картинками рецептов: в docker-compose
+# общий с nginx том подключен только к media/recipes/.
+THUMBNAIL_PREFIX = 'recipes/cache/'
+
+RECIPE_IMAGE_WORKERS = int(os.getenv('RECIPE_IMAGE_WORKERS', default=2))
+RECIPE_IMAGE_MAX_SIZE = int(
+    os.getenv('RECIPE_IMAGE_MAX_SIZE', default=10 * 1024 * 1024)
+)
+# По умолчанию как Image.MAX_IMAGE_PIXELS в Pillow, который можно отключить.
+RECIPE_IMAGE_MAX_PIXELS = int(
+    os.getenv('RECIPE_IMAGE_MAX_PIXELS', default=89478485)
+)
+
+FEED_FANOUT_LIMIT = int(os.getenv('FEED_FANOUT_LIMIT', default=1000))
+FEED_BACKFILL_LIMIT = int(os.getenv('FEED_BACKFILL_LIMIT', default=500))
+
+FAST_READ_PATH = os.getenv('FAST_READ_PATH', default='1') == '1'
+
+SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', default=500))
+SLOW_REQUEST_TOP_QUERIES = int(
+    os.getenv('SLOW_REQUEST_TOP_QUERIES', default=5)
+)
+
+PROFILE_DIR = os.getenv(
+    'PROFILE_DIR', default=os.path.join(BASE_DIR, 'profiles')
+)
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', default=0))
+PROFILE_INTERVAL = float(os.getenv('PROFILE_INTERVAL', default=0.001))
+PROFILE_MAX_DUMPS = int(os.getenv('PROFILE_MAX_DUMPS', default=200))
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
@@ -115,6 +173,10 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.OrjsonRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'api.paginators.LimitPageNumberPagination',
     'PAGE_SIZE': 6,
 }
@@ -1,50 +1,144 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+from api.ingredient_index import ingredient_index
+from api.paginators import estimate_count
 
 from .models import (
     Favorite, Follow, Ingredient, IngredientRecipe,
-    Recipe, RecipeTag, ShoppingCart, Tag, User
+    Recipe, RecipeTag, ShoppingCart, ShoppingListItem, Tag, User, UserStats
 )
+from .search import get_search_backend
+
+EXACT_COUNT_LIMIT = 10000
+
+
+class EstimatedCountPaginator(Paginator):
+    """Считает строки точно только на небольших таблицах.
+
+    На больших COUNT(*) читает всю таблицу, поэтому число строк берется
+    из оценки планировщика.
+    """
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if estimate > EXACT_COUNT_LIMIT:
+            return estimate
+        return super().count
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 class CustomUserAdmin(UserAdmin):
-    list_filter = ('first_name', 'email')
+    list_filter = ('is_staff', 'is_active')
+    search_fields = ('username',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск по началу логина идет по индексу уникального поля.
+        if not search_term:
+            return queryset, False
+        return queryset.filter(username__startswith=search_term), False
 
 
 class IngredientAmount(admin.TabularInline):
     model = IngredientRecipe
     extra = 1
+    autocomplete_fields = ('ingredient',)
 
 
 class TagInRecipe(admin.TabularInline):
     model = RecipeTag
     extra = 1
+    autocomplete_fields = ('tag',)
 
 
 @admin.register(Recipe)
-class RecipeAdmin(admin.ModelAdmin):
-    list_display = ('name', 'author', 'favorites__count')
-    search_fields = ('name', 'author')
-    list_filter = ('author', 'name', 'tags')
-    filter_horizontal = ('ingredients',)
+class RecipeAdmin(ScalableAdmin):
+    list_display = ('name', 'author', 'favorites_count', 'in_carts_count')
+    list_select_related = ('author',)
+    search_fields = ('name',)
+    list_filter = ('tags',)
+    autocomplete_fields = ('author',)
     inlines = [IngredientAmount, TagInRecipe]
 
-    @admin.display(description='В избранном')
-    def favorites__count(self, obj):
-        return obj.favorites.count()
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return get_search_backend().search(queryset, search_term), False
 
 
 @admin.register(Ingredient)
 class IngredientAdmin(admin.ModelAdmin):
-    list_filter = ('name',)
     list_display = ('name', 'measurement_unit')
+    search_fields = ('name',)
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return queryset.filter(id__in=[
+            ingredient['id']
+            for ingredient in ingredient_index.search(search_term)
+        ]), False
+
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ('name', 'color', 'slug')
+    search_fields = ('name', 'slug')
+
+
+@admin.register(IngredientRecipe)
+class IngredientRecipeAdmin(ScalableAdmin):
+    list_display = ('recipe', 'ingredient', 'amount')
+    list_select_related = ('recipe', 'ingredient')
+    raw_id_fields = ('recipe',)
+    autocomplete_fields = ('ingredient',)
+
+
+@admin.register(RecipeTag)
+class RecipeTagAdmin(ScalableAdmin):
+    list_display = ('recipe', 'tag')
+    list_select_related = ('recipe', 'tag')
+    raw_id_fields = ('recipe',)
+    autocomplete_fields = ('tag',)
+
+
+@admin.register(Follow)
+class FollowAdmin(ScalableAdmin):
+    list_display = ('follower', 'author')
+    list_select_related = ('follower', 'author')
+    raw_id_fields = ('follower', 'author')
+
+
+@admin.register(Favorite, ShoppingCart)
+class UserRecipeAdmin(ScalableAdmin):
+    list_display = ('user', 'recipe')
+    list_select_related = ('user', 'recipe')
+    raw_id_fields = ('user', 'recipe')
+
+
+@admin.register(ShoppingListItem)
+class ShoppingListItemAdmin(ScalableAdmin):
+    list_display = ('user', 'ingredient', 'total_amount')
+    list_select_related = ('user', 'ingredient')
+    raw_id_fields = ('user',)
+    autocomplete_fields = ('ingredient',)
+
+
+@admin.register(UserStats)
+class UserStatsAdmin(ScalableAdmin):
+    list_display = ('user', 'recipes_count', 'followers_count')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
 
 
 admin.site.unregister(User)
 admin.site.register(User, CustomUserAdmin)
-admin.site.register(Tag)
-admin.site.register(IngredientRecipe)
-admin.site.register(RecipeTag)
-admin.site.register(Follow)
-admin.site.register(Favorite)
-admin.site.register(ShoppingCart)
@@ -0,0 +1,105 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import Follow, Recipe, TimelineEntry, UserStats
+
+BATCH_SIZE = 1000
+
+
+def is_popular(author_id):
+    return UserStats.objects.filter(
+        user=author_id,
+        followers_count__gt=settings.FEED_FANOUT_LIMIT
+    ).exists()
+
+
+def fan_out_recipe(recipe):
+    """Раскладывает новый рецепт по лентам подписчиков автора.
+
+    Рецепты популярных авторов не раскладываются: их читают из таблицы
+    рецептов в момент запроса ленты.
+    """
+    if is_popular(recipe.author_id):
+        return
+    followers = Follow.objects.filter(
+        author=recipe.author_id
+    ).values_list('follower', flat=True)
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(
+            user_id=follower, author_id=recipe.author_id, recipe=recipe
+        ) for follower in followers.iterator()),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def backfill_timeline(user, author):
+    if is_popular(author.id):
+        return
+    recipes = Recipe.objects.filter(author=author).order_by(
+        '-id'
+    ).values_list('id', flat=True)[:settings.FEED_BACKFILL_LIMIT]
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user=user, author=author, recipe_id=recipe)
+         for recipe in recipes),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def prune_timeline(user, author):
+    TimelineEntry.objects.filter(user=user, author=author).delete()
+
+
+# Последние FEED_BACKFILL_LIMIT рецептов каждого автора, у которого не больше
+# FEED_FANOUT_LIMIT подписчиков, для всех его подписчиков.
+FILL_TIMELINES = """
+    INSERT INTO recipes_timelineentry (user_id, author_id, recipe_id)
+    SELECT follow.follower_id, recipe.author_id, recipe.id
+    FROM (
+        SELECT id, author_id, ROW_NUMBER() OVER (
+            PARTITION BY author_id ORDER BY id DESC
+        ) AS position
+        FROM recipes_recipe
+    ) recipe
+    JOIN recipes_follow follow ON follow.author_id = recipe.author_id
+    JOIN recipes_userstats stats ON stats.user_id = recipe.author_id
+    WHERE recipe.position <= %s AND stats.followers_count <= %s
+"""
+
+
+def rebuild_timelines(users=None):
+    """Заново собирает ленты пользователей users (по умолчанию всех).
+
+    Ленты строятся одним INSERT ... SELECT с тем же ограничением на автора,
+    что и при подписке.
+    """
+    sql = FILL_TIMELINES
+    params = [settings.FEED_BACKFILL_LIMIT, settings.FEED_FANOUT_LIMIT]
+    entries = TimelineEntry.objects.all()
+    if users is not None:
+        users = list(users)
+        sql += ' AND follow.follower_id IN ({})'.format(
+            ', '.join(['%s'] * len(users))
+        )
+        params += users
+        entries = entries.filter(user__in=users)
+    with transaction.atomic():
+        entries.delete()
+        if users is None or users:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+
+
+def feed_filter(user):
+    """Условие на рецепты ленты: записи ленты и рецепты популярных авторов."""
+    popular = list(Follow.objects.filter(
+        follower=user,
+        author__stats__followers_count__gt=settings.FEED_FANOUT_LIMIT
+    ).values_list('author', flat=True))
+    if not popular:
+        return Q(timeline_entries__user=user)
+    return Q(id__in=TimelineEntry.objects.filter(
+        user=user
+    ).values('recipe')) | Q(author__in=popular)
@@ -0,0 +1,113 @@
+import logging
+import mimetypes
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from sorl.thumbnail import get_thumbnail
+
+from api.cache import invalidate_recipes
+
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+IMAGE_WIDTHS = (320, 640, 1280)
+IMAGE_FORMATS = {
+    'image/webp': 'WEBP',
+    'image/jpeg': 'JPEG',
+}
+IMAGE_QUALITY = 80
+
+
+def build_image_variants(recipe):
+    """Создаёт уменьшенные копии картинки рецепта во всех форматах."""
+    variants = {}
+    for content_type, image_format in IMAGE_FORMATS.items():
+        sizes = {}
+        for width in IMAGE_WIDTHS:
+            thumbnail = get_thumbnail(
+                recipe.image,
+                str(width),
+                format=image_format,
+                quality=IMAGE_QUALITY,
+                upscale=False
+            )
+            sizes.setdefault(thumbnail.width, thumbnail.name)
+        variants[content_type] = [
+            [sizes[width], width] for width in sorted(sizes)
+        ]
+    return variants
+
+
+def process_recipe_image(recipe_id):
+    """Строит копии и сохраняет их, если картинка рецепта не сменилась."""
+    recipe = Recipe.objects.filter(pk=recipe_id).only('image').first()
+    if recipe is None or not recipe.image:
+        return
+    try:
+        variants = build_image_variants(recipe)
+    except Exception:
+        logger.exception(f'Image variants failed for recipe {recipe_id}')
+        return
+    if Recipe.objects.filter(pk=recipe_id, image=recipe.image.name).update(
+        image_variants=variants
+    ):
+        invalidate_recipes()
+
+
+def _run(recipe_id):
+    close_old_connections()
+    try:
+        process_recipe_image(recipe_id)
+    finally:
+        close_old_connections()
+
+
+@lru_cache(maxsize=None)
+def get_executor():
+    # При гонке лишний пул отбрасывается: потоки стартуют только в submit.
+    return ThreadPoolExecutor(
+        max_workers=settings.RECIPE_IMAGE_WORKERS,
+        thread_name_prefix='recipe-images'
+    )
+
+
+def schedule_image_variants(recipe):
+    """Ставит построение копий в очередь после фиксации транзакции."""
+    recipe_id = recipe.pk
+    transaction.on_commit(lambda: get_executor().submit(_run, recipe_id))
+
+
+def build_srcset(name, variants, build_url=None):
+    """Возвращает srcset для каждого формата либо исходную картинку."""
+    build_url = build_url or (lambda url: url)
+    if not name:
+        return {}
+    if not variants:
+        content_type = mimetypes.guess_type(name)[0]
+        return {content_type or 'image': build_url(default_storage.url(name))}
+    return {
+        content_type: ', '.join(
+            f'{build_url(default_storage.url(variant))} {width}w'
+            for variant, width in sizes
+        ) for content_type, sizes in variants.items()
+    }
+
+
+def variant_url(name, variants, content_type='image/jpeg'):
+    """Самая маленькая копия картинки или оригинал, пока копий нет."""
+    sizes = variants.get(content_type)
+    if not sizes:
+        return default_storage.url(name)
+    return default_storage.url(sizes[0][0])
+
+
+def image_srcset(recipe, build_url=None):
+    return build_srcset(recipe.image.name, recipe.image_variants, build_url)
+
+
+def thumbnail_url(recipe, content_type='image/jpeg'):
+    return variant_url(recipe.image.name, recipe.image_variants, content_type)
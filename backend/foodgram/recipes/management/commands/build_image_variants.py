@@ -0,0 +1,39 @@
+import logging
+import sys
+
+from django.core.management import BaseCommand
+from recipes.images import process_recipe_image
+from recipes.models import Recipe
+
+formatter = logging.Formatter(
+    '%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+handler = logging.StreamHandler(sys.stdout)
+handler.setFormatter(formatter)
+logger.addHandler(handler)
+
+
+class Command(BaseCommand):
+    help = 'Строит уменьшенные копии картинок рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Перестроить копии и для рецептов, у которых они уже есть'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        recipes = Recipe.objects.exclude(image='')
+        if not options['all']:
+            recipes = recipes.filter(image_variants={})
+        recipe_ids = list(recipes.order_by('id').values_list('id', flat=True))
+        for processed, recipe_id in enumerate(recipe_ids, 1):
+            process_recipe_image(recipe_id)
+            if processed % batch_size == 0:
+                logger.info(f'Processed images: {processed}')
+        logger.info(f'Image variants built: {len(recipe_ids)} recipes')
@@ -0,0 +1,292 @@
+import json
+import re
+from collections import defaultdict
+from functools import lru_cache
+from itertools import combinations
+
+from django.apps import apps
+from django.core.management import BaseCommand
+from django.db import connection, models
+from django.test.utils import CaptureQueriesContext, override_settings
+from recipes.models import Follow, Ingredient, Tag, User, UserStats
+from rest_framework.test import APIClient
+
+FILTER_COLUMN = re.compile(
+    r'"(\w+)"\."(\w+)"\s*(?:<=|>=|=|<|>|IN\b|IS\b|LIKE\b)'
+    r'(?!\s*"\w+"\.)',
+    re.IGNORECASE
+)
+ORDER_COLUMN = re.compile(r'"(\w+)"\."(\w+)"\s+(ASC|DESC)', re.IGNORECASE)
+TABLE_ALIAS = re.compile(r'"(\w+)"\s+(?:AS\s+)?"?([UT]\d+)\b')
+
+
+def build_requests(user):
+    """Типичные запросы API для пользователя user."""
+    tag = Tag.objects.values_list('slug', flat=True).first()
+    author = UserStats.objects.order_by(
+        '-recipes_count'
+    ).values_list('user', flat=True).first()
+    ingredient = Ingredient.objects.values_list('name', flat=True).first()
+    filters = {
+        'tags': tag,
+        'author': author,
+        'is_favorited': 1,
+        'is_in_shopping_cart': 1,
+    }
+    urls = []
+    for size in range(len(filters) + 1):
+        for names in combinations(filters, size):
+            query = '&'.join(f'{name}={filters[name]}' for name in names)
+            urls.append(f'/api/recipes/?{query}'.rstrip('?'))
+    urls += [
+        '/api/recipes/?cursor',
+        '/api/recipes/feed/',
+        '/api/recipes/trending/',
+        '/api/users/subscriptions/?recipes_limit=3',
+        '/api/recipes/download_shopping_cart/',
+        '/api/ingredients/',
+        f'/api/ingredients/?name={(ingredient or "")[:3]}',
+    ]
+    return urls
+
+
+def capture_queries(user, urls):
+    """Выполняет запросы и возвращает пары (адрес, SQL)."""
+    client = APIClient()
+    client.force_authenticate(user)
+    queries = []
+    with override_settings(ALLOWED_HOSTS=['*']):
+        for url in urls:
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            queries += [
+                (url, query['sql']) for query in context.captured_queries
+                if query['sql'].lstrip().upper().startswith(
+                    ('SELECT', 'WITH')
+                )
+            ]
+    return queries
+
+
+def walk(node):
+    yield node
+    for child in node.get('Plans', ()):
+        yield from walk(child)
+
+
+def relation(node):
+    return next(
+        (child['Relation Name'] for child in walk(node)
+         if 'Relation Name' in child),
+        None
+    )
+
+
+def postgresql_issues(sql, min_rows):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}')
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    for node in walk(plan[0]['Plan']):
+        loops = node.get('Actual Loops', 1)
+        time = node.get('Actual Total Time', 0) * loops
+        if node['Node Type'] == 'Seq Scan':
+            rows = (
+                node.get('Actual Rows', 0)
+                + node.get('Rows Removed by Filter', 0)
+            ) * loops
+            if rows >= min_rows:
+                yield 'seq_scan', node['Relation Name'], time
+        elif node['Node Type'] == 'Sort' and (
+            node.get('Sort Space Type') == 'Disk'
+        ):
+            yield 'sort_spill', relation(node), time
+
+
+@lru_cache(maxsize=None)
+def table_rows(table):
+    if table not in connection.introspection.table_names():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}'
+        )
+        return cursor.fetchone()[0]
+
+
+def order_table(sql):
+    match = ORDER_COLUMN.search(sql.rpartition('ORDER BY')[2])
+    return match and match.group(1)
+
+
+def sqlite_issues(sql, min_rows):
+    """Полные проходы и сортировки без индекса по EXPLAIN QUERY PLAN.
+
+    SQLite не сообщает число строк, поэтому порог сравнивается с размером
+    таблицы, а сортировка отмечается, только если ее таблица читалась
+    целиком.
+    """
+    aliases = dict(
+        (alias, table) for table, alias in TABLE_ALIAS.findall(sql)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        details = [row[-1] for row in cursor.fetchall()]
+    scanned = set()
+    for detail in details:
+        words = detail.replace(' TABLE ', ' ').split()
+        if words[0] == 'SCAN' and 'USING' not in words:
+            table = aliases.get(words[1], words[1])
+            scanned.add(table)
+            if table_rows(table) >= min_rows:
+                yield 'seq_scan', table, table_rows(table)
+        elif detail.startswith('USE TEMP B-TREE FOR ORDER BY'):
+            table = order_table(sql)
+            if table in scanned and table_rows(table) >= min_rows:
+                yield 'sort', table, table_rows(table)
+
+
+def existing_indexes(model):
+    meta = model._meta
+
+    def columns(fields):
+        return tuple(
+            meta.get_field(name.lstrip('-')).column for name in fields
+        )
+
+    indexes = [(meta.pk.column,)]
+    indexes += [
+        (field.column,) for field in meta.local_fields
+        if field.db_index or field.unique
+    ]
+    indexes += [columns(index.fields) for index in meta.indexes]
+    indexes += [
+        columns(constraint.fields) for constraint in meta.constraints
+        if isinstance(constraint, models.UniqueConstraint)
+    ]
+    indexes += [columns(fields) for fields in meta.unique_together]
+    return indexes
+
+
+def suggest_index(model, sql):
+    """Индекс из колонок фильтра и сортировки таблицы модели."""
+    table = model._meta.db_table
+    names = {
+        field.column: field.name for field in model._meta.local_fields
+    }
+    fields = []
+    for column_table, column in FILTER_COLUMN.findall(sql):
+        if column_table == table and names.get(column) not in fields + [
+            None, model._meta.pk.name
+        ]:
+            fields.append(names[column])
+    order = [
+        ('-' if direction.upper() == 'DESC' else '') + names[column]
+        for column_table, column, direction in ORDER_COLUMN.findall(
+            sql.rpartition('ORDER BY')[2]
+        ) if column_table == table and column in names
+    ]
+    fields += [name for name in order if name.lstrip('-') not in fields]
+    if not fields or fields[0].lstrip('-') == model._meta.pk.name:
+        return None, False
+    columns = tuple(
+        model._meta.get_field(name.lstrip('-')).column for name in fields
+    )
+    exists = any(
+        index[:len(columns)] == columns
+        for index in existing_indexes(model)
+    )
+    name = '_'.join(name.lstrip('-') for name in fields)
+    name = f'{model._meta.model_name}_{name}'[:26] + '_idx'
+    return (
+        f'{model.__name__}.Meta.indexes: models.Index('
+        f'fields={fields!r}, name={name!r})'
+    ), exists
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет типичные запросы API, разбирает планы их SQL и '
+        'предлагает индексы для recipes/models.py'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='id пользователя')
+        parser.add_argument(
+            '--min-rows',
+            type=int,
+            default=1000,
+            help='Не отмечать полные проходы по таблицам меньше этого'
+        )
+
+    def get_user(self, user_id):
+        if user_id is not None:
+            return User.objects.get(id=user_id)
+        follower = Follow.objects.values_list('follower', flat=True).first()
+        return User.objects.filter(
+            id=follower
+        ).first() or User.objects.order_by('id').first()
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['user'])
+        table_rows.cache_clear()
+        queries = capture_queries(user, build_requests(user))
+        explain = (
+            postgresql_issues if connection.vendor == 'postgresql'
+            else sqlite_issues
+        )
+        models_by_table = {
+            model._meta.db_table: model for model in apps.get_models()
+        }
+        report = {}
+        seen = set()
+        for url, sql in queries:
+            if (url, sql) in seen:
+                continue
+            seen.add((url, sql))
+            for kind, table, score in explain(sql, options['min_rows']):
+                model = models_by_table.get(table)
+                suggestion, exists = (
+                    suggest_index(model, sql) if model
+                    else (None, False)
+                )
+                issue = report.setdefault((kind, table, suggestion), {
+                    'score': 0, 'urls': set(), 'exists': exists,
+                    'app': model._meta.app_label if model else None,
+                })
+                issue['score'] += score
+                issue['urls'].add(url)
+        self.write_report(report, len(seen))
+
+    def write_report(self, report, statements):
+        self.stdout.write(
+            f'Проверено запросов SQL: {statements}, проблем: {len(report)}'
+        )
+        issues = sorted(
+            report.items(), key=lambda item: item[1]['score'], reverse=True
+        )
+        by_app = defaultdict(list)
+        for position, ((kind, table, suggestion), issue) in enumerate(
+            issues, 1
+        ):
+            self.stdout.write(
+                f'{position}. [{kind}] {table} '
+                f'оценка={issue["score"]:.1f} '
+                f'запросов API={len(issue["urls"])}'
+            )
+            for url in sorted(issue['urls'])[:3]:
+                self.stdout.write(f'   {url}')
+            if suggestion is None:
+                continue
+            if issue['exists']:
+                self.stdout.write(f'   Индекс уже есть: {suggestion}')
+            else:
+                self.stdout.write(f'   Предложение: {suggestion}')
+                by_app[issue['app']].append(suggestion)
+        if by_app['recipes']:
+            self.stdout.write('Индексы для recipes/models.py:')
+        for suggestion in dict.fromkeys(by_app['recipes']):
+            self.stdout.write(self.style.WARNING(suggestion))
@@ -0,0 +1,34 @@
+import logging
+import sys
+from datetime import timedelta
+
+from django.core.management import BaseCommand
+from django.utils import timezone
+from recipes.models import ImageUpload
+
+formatter = logging.Formatter(
+    '%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+handler = logging.StreamHandler(sys.stdout)
+handler.setFormatter(formatter)
+logger.addHandler(handler)
+
+
+class Command(BaseCommand):
+    help = 'Удаляет загруженные картинки, не привязанные к рецептам'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24)
+
+    def handle(self, *args, **options):
+        uploads = ImageUpload.objects.filter(
+            created__lt=timezone.now() - timedelta(hours=options['hours'])
+        )
+        deleted = 0
+        for upload in uploads.iterator():
+            upload.image.delete(save=False)
+            upload.delete()
+            deleted += 1
+        logger.info(f'Image uploads deleted: {deleted}')
@@ -0,0 +1,38 @@
+import logging
+import sys
+
+from django.core.management import BaseCommand
+from django.db.models import Max
+from recipes.models import Recipe
+from recipes.search import get_search_backend
+
+from api.cache import RECIPES_VERSION_KEY, bump_version
+
+formatter = logging.Formatter(
+    '%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+handler = logging.StreamHandler(sys.stdout)
+handler.setFormatter(formatter)
+logger.addHandler(handler)
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает поисковый индекс рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        batch_size = options['batch_size']
+        last = Recipe.objects.aggregate(last=Max('id'))['last'] or 0
+        for start in range(0, last, batch_size):
+            end = min(start + batch_size, last)
+            backend.index_range(start, end)
+            logger.info(f'Indexed recipes: id {end}/{last}')
+        bump_version(RECIPES_VERSION_KEY)
+        logger.info(
+            f'Search index rebuilt: {Recipe.objects.count()} recipes'
+        )
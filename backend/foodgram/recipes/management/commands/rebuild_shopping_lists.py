@@ -0,0 +1,43 @@
+import logging
+import sys
+
+from django.core.management import BaseCommand
+from recipes.models import ShoppingCart, ShoppingListItem
+
+formatter = logging.Formatter(
+    '%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+handler = logging.StreamHandler(sys.stdout)
+handler.setFormatter(formatter)
+logger.addHandler(handler)
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает списки покупок по содержимому корзин'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, nargs='*')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        users = options['user']
+        if not users:
+            users = sorted(
+                set(ShoppingCart.objects.values_list(
+                    'user', flat=True
+                ).distinct())
+                | set(ShoppingListItem.objects.values_list(
+                    'user', flat=True
+                ).distinct())
+            )
+        batch_size = options['batch_size']
+        for start in range(0, len(users), batch_size):
+            ShoppingListItem.objects.refresh(
+                users=users[start:start + batch_size]
+            )
+            logger.info(
+                f'Rebuilt shopping lists: '
+                f'{min(start + batch_size, len(users))}/{len(users)}'
+            )
@@ -0,0 +1,25 @@
+import logging
+import sys
+
+from django.core.management import BaseCommand
+from recipes.feed import rebuild_timelines
+
+formatter = logging.Formatter(
+    '%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+handler = logging.StreamHandler(sys.stdout)
+handler.setFormatter(formatter)
+logger.addHandler(handler)
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает ленты подписок пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, nargs='*')
+
+    def handle(self, *args, **options):
+        rebuild_timelines(options['user'] or None)
+        logger.info('Timelines rebuilt')
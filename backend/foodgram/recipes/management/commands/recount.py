@@ -0,0 +1,62 @@
+import logging
+import sys
+
+from django.core.management import BaseCommand
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from recipes.models import (
+    Favorite, Follow, Recipe, ShoppingCart, User, UserStats
+)
+
+formatter = logging.Formatter(
+    '%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+handler = logging.StreamHandler(sys.stdout)
+handler.setFormatter(formatter)
+logger.addHandler(handler)
+
+
+def count(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by().values(
+            field
+        ).annotate(count=Count('pk')).values('count')
+    ), 0)
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счетчики рецептов и пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        UserStats.objects.bulk_create(
+            (UserStats(user_id=user) for user in User.objects.filter(
+                stats__isnull=True
+            ).values_list('id', flat=True).iterator()),
+            batch_size=self.batch_size,
+            ignore_conflicts=True
+        )
+        self.recount(
+            UserStats.objects.all(),
+            recipes_count=count(Recipe, 'author'),
+            followers_count=count(Follow, 'author')
+        )
+        self.recount(
+            Recipe.objects.all(),
+            favorites_count=count(Favorite, 'recipe'),
+            in_carts_count=count(ShoppingCart, 'recipe')
+        )
+
+    def recount(self, queryset, **counters):
+        last = queryset.aggregate(last=Max('pk'))['last'] or 0
+        updated = 0
+        for start in range(0, last + 1, self.batch_size):
+            updated += queryset.filter(
+                pk__gte=start, pk__lt=start + self.batch_size
+            ).update(**counters)
+        logger.info(f'{queryset.model._meta.verbose_name_plural}: {updated}')
@@ -0,0 +1,219 @@
+import logging
+import random
+import sys
+from itertools import accumulate, islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import BaseCommand, call_command
+from recipes.models import (
+    Favorite, Follow, Ingredient, IngredientRecipe,
+    Recipe, RecipeTag, ShoppingCart, Tag, User
+)
+
+from api.cache import RECIPES_VERSION_KEY, TAGS_VERSION_KEY, bump_version
+
+formatter = logging.Formatter(
+    '%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+handler = logging.StreamHandler(sys.stdout)
+handler.setFormatter(formatter)
+logger.addHandler(handler)
+
+DEFAULT_TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+)
+WORDS = (
+    'суп', 'салат', 'пирог', 'каша', 'соус', 'запеканка', 'рагу',
+    'быстрый', 'домашний', 'острый', 'сладкий', 'летний', 'постный',
+    'с', 'курицей', 'грибами', 'сыром', 'овощами', 'яблоками', 'рисом',
+)
+PASSWORD = 'foodgram'
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
+
+
+def zipf_weights(count, exponent):
+    return list(accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)
+    ))
+
+
+class Command(BaseCommand):
+    help = 'Генерирует синтетические данные для нагрузочного тестирования'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--follows', type=int, default=10000)
+        parser.add_argument('--favorites', type=int, default=50000)
+        parser.add_argument('--carts', type=int, default=20000)
+        parser.add_argument('--min-ingredients', type=int, default=5)
+        parser.add_argument('--max-ingredients', type=int, default=20)
+        parser.add_argument('--zipf', type=float, default=1.1)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.zipf = options['zipf']
+
+        tag_ids = self.load_tags()
+        ingredient_ids = self.load_ingredients()
+        user_ids = self.create_users(options['users'])
+        if not user_ids:
+            logger.error('No users to seed recipes for...exiting.')
+            return
+        recipe_ids = self.create_recipes(options['recipes'], user_ids)
+        if not recipe_ids:
+            logger.error('No recipes to relate...exiting.')
+            return
+        self.create_recipe_relations(
+            recipe_ids,
+            tag_ids,
+            ingredient_ids,
+            options['min_ingredients'],
+            options['max_ingredients']
+        )
+        self.create_follows(options['follows'], user_ids)
+        recipe_weights = zipf_weights(len(recipe_ids), self.zipf)
+        for model, count in (
+            (Favorite, options['favorites']),
+            (ShoppingCart, options['carts']),
+        ):
+            self.create_user_recipes(
+                model, count, user_ids, recipe_ids, recipe_weights
+            )
+        call_command('recount', batch_size=self.batch_size)
+        call_command('rebuild_shopping_lists', batch_size=self.batch_size)
+        call_command('rebuild_timelines')
+        call_command('rebuild_search_index', batch_size=self.batch_size)
+        bump_version(TAGS_VERSION_KEY)
+        bump_version(RECIPES_VERSION_KEY)
+        logger.info('Seeding finished')
+
+    def bulk_create(self, model, objects, ignore_conflicts=False):
+        created = 0
+        for batch in batched(objects, self.batch_size):
+            model.objects.bulk_create(
+                batch, ignore_conflicts=ignore_conflicts
+            )
+            created += len(batch)
+            logger.info(f'{model.__name__}: {created}')
+
+    def load_tags(self):
+        if not Tag.objects.exists():
+            Tag.objects.bulk_create(
+                Tag(name=name, color=color, slug=slug)
+                for name, color, slug in DEFAULT_TAGS
+            )
+        return list(Tag.objects.values_list('id', flat=True))
+
+    def load_ingredients(self):
+        if not Ingredient.objects.exists():
+            call_command('sync_ingredients')
+        return list(Ingredient.objects.values_list('id', flat=True))
+
+    def create_users(self, count):
+        start = User.objects.order_by('-id').values_list(
+            'id', flat=True
+        ).first() or 0
+        password = make_password(PASSWORD)
+        self.bulk_create(User, (
+            User(
+                username=f'user{start + i}',
+                email=f'user{start + i}@foodgram.ru',
+                first_name='Имя',
+                last_name='Фамилия',
+                password=password
+            ) for i in range(1, count + 1)
+        ))
+        return list(User.objects.filter(id__gt=start).values_list(
+            'id', flat=True
+        ).order_by('id'))
+
+    def create_recipes(self, count, user_ids):
+        start = Recipe.objects.order_by('-id').values_list(
+            'id', flat=True
+        ).first() or 0
+        author_weights = zipf_weights(len(user_ids), self.zipf)
+        authors = (
+            author
+            for batch in batched(range(count), self.batch_size)
+            for author in self.rng.choices(
+                user_ids, cum_weights=author_weights, k=len(batch)
+            )
+        )
+        self.bulk_create(Recipe, (
+            Recipe(
+                author_id=author,
+                name=' '.join(self.rng.sample(WORDS, 3)).capitalize(),
+                text=' '.join(self.rng.choices(WORDS, k=30)),
+                cooking_time=self.rng.randint(5, 180),
+                image='recipes/seed.png'
+            ) for author in authors
+        ))
+        return list(Recipe.objects.filter(id__gt=start).values_list(
+            'id', flat=True
+        ).order_by('id'))
+
+    def create_recipe_relations(self, recipe_ids, tag_ids, ingredient_ids,
+                                min_ingredients, max_ingredients):
+        self.bulk_create(RecipeTag, (
+            RecipeTag(recipe_id=recipe, tag_id=tag)
+            for recipe in recipe_ids
+            for tag in self.rng.sample(
+                tag_ids, self.rng.randint(1, len(tag_ids))
+            )
+        ))
+        max_ingredients = min(max_ingredients, len(ingredient_ids))
+        self.bulk_create(IngredientRecipe, (
+            IngredientRecipe(
+                recipe_id=recipe,
+                ingredient_id=ingredient,
+                amount=self.rng.randint(1, 500)
+            )
+            for recipe in recipe_ids
+            for ingredient in self.rng.sample(
+                ingredient_ids,
+                self.rng.randint(min_ingredients, max_ingredients)
+            )
+        ))
+
+    def create_follows(self, count, user_ids):
+        author_weights = zipf_weights(len(user_ids), self.zipf)
+        pairs = (
+            (self.rng.choice(user_ids), author)
+            for batch in batched(range(count), self.batch_size)
+            for author in self.rng.choices(
+                user_ids, cum_weights=author_weights, k=len(batch)
+            )
+        )
+        self.bulk_create(Follow, (
+            Follow(follower_id=follower, author_id=author)
+            for follower, author in pairs if follower != author
+        ), ignore_conflicts=True)
+
+    def create_user_recipes(self, model, count, user_ids, recipe_ids,
+                            recipe_weights):
+        recipes = (
+            recipe
+            for batch in batched(range(count), self.batch_size)
+            for recipe in self.rng.choices(
+                recipe_ids, cum_weights=recipe_weights, k=len(batch)
+            )
+        )
+        self.bulk_create(model, (
+            model(user_id=self.rng.choice(user_ids), recipe_id=recipe)
+            for recipe in recipes
+        ), ignore_conflicts=True)
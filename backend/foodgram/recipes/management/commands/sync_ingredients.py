@@ -0,0 +1,153 @@
+import json
+import logging
+import os
+import sys
+from csv import DictReader
+
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from recipes.models import Ingredient, IngredientRecipe
+
+from api.cache import INGREDIENTS_VERSION_KEY, bump_version
+
+formatter = logging.Formatter(
+    '%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+handler = logging.StreamHandler(sys.stdout)
+handler.setFormatter(formatter)
+logger.addHandler(handler)
+
+DEFAULT_PATH = os.path.join(
+    os.path.dirname(__file__),
+    '..', '..', '..',
+    'static', 'data',
+    'ingredients.csv'
+)
+
+
+def clean(value):
+    return ' '.join(value.split())
+
+
+def ingredient_key(name, measurement_unit):
+    return clean(name).casefold(), clean(measurement_unit).casefold()
+
+
+def read_csv(path):
+    with open(path, encoding='utf-8') as csv_file:
+        for row in DictReader(csv_file):
+            yield row['name'], row['unit']
+
+
+def read_json(path):
+    # Файл читается целиком: в stdlib нет потокового разбора JSON, а
+    # справочник и так держится в памяти в existing и seen.
+    with open(path, encoding='utf-8') as json_file:
+        for row in json.load(json_file):
+            yield row['name'], row['measurement_unit']
+
+
+READERS = {
+    '.csv': read_csv,
+    '.json': read_json,
+}
+
+
+class Command(BaseCommand):
+    help = 'Синхронизирует справочник ингредиентов с файлом CSV или JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=DEFAULT_PATH)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--delete-missing',
+            action='store_true',
+            help='Удалить ингредиенты, которых нет в файле '
+                 'и которые не используются в рецептах'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        reader = READERS.get(os.path.splitext(path)[1].lower())
+        if reader is None:
+            raise CommandError('Поддерживаются только файлы .csv и .json')
+        self.batch_size = options['batch_size']
+
+        existing = {}
+        for ingredient in Ingredient.objects.order_by('id').iterator():
+            existing.setdefault(
+                ingredient_key(
+                    ingredient.name, ingredient.measurement_unit
+                ),
+                ingredient
+            )
+        seen = set()
+        to_create, to_update = [], []
+        created = updated = skipped = 0
+        for name, measurement_unit in reader(path):
+            name, measurement_unit = clean(name), clean(measurement_unit)
+            key = ingredient_key(name, measurement_unit)
+            if not name or key in seen:
+                skipped += 1
+                continue
+            seen.add(key)
+            ingredient = existing.get(key)
+            if ingredient is None:
+                to_create.append(Ingredient(
+                    name=name, measurement_unit=measurement_unit
+                ))
+            elif (ingredient.name, ingredient.measurement_unit) != (
+                name, measurement_unit
+            ):
+                ingredient.name = name
+                ingredient.measurement_unit = measurement_unit
+                to_update.append(ingredient)
+            if len(to_create) >= self.batch_size:
+                created += self.flush(to_create, [])
+            if len(to_update) >= self.batch_size:
+                updated += self.flush([], to_update)
+        created += self.flush(to_create, [])
+        updated += self.flush([], to_update)
+        logger.info(
+            f'Ingredients created: {created}, updated: {updated}, '
+            f'duplicates skipped: {skipped}'
+        )
+        if options['delete_missing']:
+            self.delete_missing(existing, seen)
+        bump_version(INGREDIENTS_VERSION_KEY)
+
+    def flush(self, to_create, to_update):
+        count = len(to_create) + len(to_update)
+        with transaction.atomic():
+            Ingredient.objects.bulk_create(to_create)
+            Ingredient.objects.bulk_update(
+                to_update, ['name', 'measurement_unit']
+            )
+        to_create.clear()
+        to_update.clear()
+        if count:
+            logger.info(f'Ingredients synced: {count}')
+        return count
+
+    def delete_missing(self, existing, seen):
+        missing = [
+            ingredient.id for key, ingredient in existing.items()
+            if key not in seen
+        ]
+        deleted = kept = 0
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            used = set(IngredientRecipe.objects.filter(
+                ingredient__in=batch
+            ).values_list('ingredient', flat=True))
+            kept += len(used)
+            _, deleted_objects = Ingredient.objects.filter(
+                id__in=set(batch) - used
+            ).delete()
+            deleted += deleted_objects.get(Ingredient._meta.label, 0)
+        logger.info(
+            f'Ingredients deleted: {deleted}, '
+            f'kept because used in recipes: {kept}'
+        )
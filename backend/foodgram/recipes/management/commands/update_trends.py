@@ -0,0 +1,37 @@
+import logging
+import sys
+from datetime import timedelta
+
+from django.core.management import BaseCommand
+from recipes.trending import HALF_LIFE, MIN_SCORE, update_trends
+
+formatter = logging.Formatter(
+    '%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+handler = logging.StreamHandler(sys.stdout)
+handler.setFormatter(formatter)
+logger.addHandler(handler)
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает популярные рецепты с последней отметки'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--half-life',
+            type=float,
+            default=HALF_LIFE / timedelta(hours=1),
+            help='Период полураспада оценки в часах'
+        )
+        parser.add_argument('--min-score', type=float, default=MIN_SCORE)
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        updated = update_trends(
+            half_life=timedelta(hours=options['half_life']),
+            min_score=options['min_score'],
+            batch_size=options['batch_size']
+        )
+        logger.info(f'Trending recipes updated: {updated}')
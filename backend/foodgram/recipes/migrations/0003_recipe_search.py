@@ -0,0 +1,237 @@
+# Generated by Django 3.2.15 on 2026-10-18 16:41
+
+import re
+from collections import Counter, defaultdict
+from itertools import islice
+
+import django.contrib.postgres.search
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Замороженная копия индексации из recipes.search на момент миграции:
+# последующие изменения модуля не должны менять то, что делает миграция.
+NAME_WEIGHT = 3
+INGREDIENT_WEIGHT = 2
+TEXT_WEIGHT = 1
+
+VOWELS = 'аеиоуыэюя'
+STOP_WORDS = frozenset((
+    'а', 'без', 'в', 'во', 'для', 'до', 'же', 'за', 'и', 'из', 'или',
+    'к', 'как', 'ко', 'на', 'не', 'но', 'о', 'об', 'от', 'по', 'под',
+    'при', 'с', 'со', 'то', 'у', 'это',
+))
+WORD_RE = re.compile(r'\w+')
+
+
+def _suffixes(groups):
+    return sorted(
+        ((ending, preceded) for preceded, group in zip((True, False), groups)
+         for ending in group),
+        key=lambda item: -len(item[0])
+    )
+
+
+PERFECTIVE_GERUND = _suffixes((
+    ('вшись', 'вши', 'в'),
+    ('ывшись', 'ившись', 'ывши', 'ивши', 'ыв', 'ив'),
+))
+ADJECTIVE = _suffixes((
+    (),
+    ('ими', 'ыми', 'его', 'ого', 'ему', 'ому', 'ее', 'ие', 'ые', 'ое',
+     'ей', 'ий', 'ый', 'ой', 'ем', 'им', 'ым', 'ом', 'их', 'ых', 'ую',
+     'юю', 'ая', 'яя', 'ою', 'ею'),
+))
+PARTICIPLE = _suffixes((
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+))
+REFLEXIVE = _suffixes(((), ('ся', 'сь')))
+VERB = _suffixes((
+    ('ете', 'йте', 'ешь', 'нно', 'ла', 'на', 'ли', 'ем', 'ло', 'но',
+     'ет', 'ют', 'ны', 'ть', 'й', 'л', 'н'),
+    ('уйте', 'ейте', 'ила', 'ыла', 'ена', 'ите', 'или', 'ыли', 'ило',
+     'ыло', 'ено', 'ует', 'уют', 'ены', 'ить', 'ыть', 'ишь', 'ей', 'уй',
+     'ил', 'ыл', 'им', 'ым', 'ен', 'ят', 'ит', 'ыт', 'ую', 'ю'),
+))
+NOUN = _suffixes((
+    (),
+    ('иями', 'ями', 'ами', 'ией', 'иям', 'ием', 'иях', 'ев', 'ов', 'ие',
+     'ье', 'еи', 'ии', 'ей', 'ой', 'ий', 'ям', 'ем', 'ам', 'ом', 'ах',
+     'ях', 'ию', 'ью', 'ия', 'ья', 'а', 'е', 'и', 'й', 'о', 'у', 'ы',
+     'ь', 'ю', 'я'),
+))
+SUPERLATIVE = _suffixes(((), ('ейше', 'ейш')))
+DERIVATIONAL = _suffixes(((), ('ость', 'ост')))
+
+
+def normalize(value):
+    return value.casefold().replace('ё', 'е')
+
+
+def _region(word, start):
+    for i in range(start + 1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            return i + 1
+    return len(word)
+
+
+def _strip(word, start, suffixes):
+    for ending, preceded in suffixes:
+        stem = word[:-len(ending)]
+        if not word.endswith(ending) or len(stem) < start:
+            continue
+        if preceded and (len(stem) <= start or stem[-1] not in 'ая'):
+            continue
+        return stem
+    return None
+
+
+def _undouble(word, rv):
+    if word.endswith('нн') and len(word) - 1 >= rv:
+        return word[:-1]
+    return word
+
+
+def stem(word):
+    """Стеммер Snowball для русского языка."""
+    rv = next(
+        (i + 1 for i, letter in enumerate(word) if letter in VOWELS),
+        len(word)
+    )
+    r2 = _region(word, _region(word, 0))
+    stemmed = _strip(word, rv, PERFECTIVE_GERUND)
+    if stemmed is None:
+        word = _strip(word, rv, REFLEXIVE) or word
+        adjective = _strip(word, rv, ADJECTIVE)
+        if adjective is not None:
+            stemmed = _strip(adjective, rv, PARTICIPLE) or adjective
+        else:
+            stemmed = _strip(word, rv, VERB) or _strip(word, rv, NOUN)
+    word = stemmed if stemmed is not None else word
+    if word.endswith('и') and len(word) - 1 >= rv:
+        word = word[:-1]
+    word = _strip(word, r2, DERIVATIONAL) or word
+    superlative = _strip(word, rv, SUPERLATIVE)
+    if superlative is not None:
+        return _undouble(superlative, rv)
+    if word.endswith('нн'):
+        return _undouble(word, rv)
+    if word.endswith('ь') and len(word) - 1 >= rv:
+        return word[:-1]
+    return word
+
+
+def tokenize(text):
+    return [
+        stem(word) for word in WORD_RE.findall(normalize(text))
+        if word not in STOP_WORDS
+    ]
+
+
+def weigh_terms(documents):
+    """Веса термов: сумма весов полей, в которых встретился терм."""
+    weights = Counter()
+    for text, weight in documents:
+        for term in tokenize(text):
+            weights[term[:64]] += weight
+    return weights
+
+
+def create_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX recipe_search_vector_gin '
+            'ON recipes_recipesearchvector USING gin (vector)'
+        )
+
+
+def drop_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX recipe_search_vector_gin')
+
+
+FILL_SEARCH_VECTORS = """
+    INSERT INTO recipes_recipesearchvector (recipe_id, vector)
+    SELECT recipe.id,
+        setweight(to_tsvector('russian',
+            replace(lower(recipe.name), 'ё', 'е')), 'A')
+        || setweight(to_tsvector('russian',
+            replace(lower(coalesce(string_agg(ingredient.name, ' '), '')),
+                    'ё', 'е')), 'B')
+        || setweight(to_tsvector('russian',
+            replace(lower(recipe.text), 'ё', 'е')), 'C')
+    FROM recipes_recipe recipe
+    LEFT JOIN recipes_ingredientrecipe item ON item.recipe_id = recipe.id
+    LEFT JOIN recipes_ingredient ingredient
+        ON ingredient.id = item.ingredient_id
+    GROUP BY recipe.id
+"""
+
+
+def fill_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(FILL_SEARCH_VECTORS)
+        return
+    Recipe = apps.get_model('recipes', 'Recipe')
+    IngredientRecipe = apps.get_model('recipes', 'IngredientRecipe')
+    RecipeSearchTerm = apps.get_model('recipes', 'RecipeSearchTerm')
+    ingredients = defaultdict(list)
+    for recipe, name in IngredientRecipe.objects.values_list(
+        'recipe', 'ingredient__name'
+    ).iterator():
+        ingredients[recipe].append(name)
+    terms = (
+        RecipeSearchTerm(recipe_id=recipe, term=term, weight=weight)
+        for recipe, name, text in Recipe.objects.values_list(
+            'id', 'name', 'text'
+        ).iterator()
+        for term, weight in weigh_terms((
+            (name, NAME_WEIGHT),
+            (' '.join(ingredients[recipe]), INGREDIENT_WEIGHT),
+            (text, TEXT_WEIGHT),
+        )).items()
+    )
+    batch = list(islice(terms, 1000))
+    while batch:
+        RecipeSearchTerm.objects.bulk_create(batch)
+        batch = list(islice(terms, 1000))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_shoppinglistitem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeSearchVector',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_vector', serialize=False, to='recipes.recipe', verbose_name='Рецепт')),
+                ('vector', django.contrib.postgres.search.SearchVectorField(null=True)),
+            ],
+            options={
+                'verbose_name': 'Поисковый вектор рецепта',
+                'verbose_name_plural': 'Поисковые векторы рецептов',
+            },
+        ),
+        migrations.CreateModel(
+            name='RecipeSearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Терм')),
+                ('weight', models.PositiveIntegerField(verbose_name='Вес')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='recipes.recipe', verbose_name='Рецепт')),
+            ],
+            options={
+                'verbose_name': 'Терм поискового индекса',
+                'verbose_name_plural': 'Термы поискового индекса',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='recipesearchterm',
+            constraint=models.UniqueConstraint(fields=('term', 'recipe'), name='unique_search_term'),
+        ),
+        migrations.RunPython(create_gin_index, drop_gin_index),
+        migrations.RunPython(fill_search_index, migrations.RunPython.noop),
+    ]
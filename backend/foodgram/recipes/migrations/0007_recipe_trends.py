@@ -0,0 +1,42 @@
+# Generated by Django 3.2.15 on 2026-10-18 16:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeTrend',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trend', serialize=False, to='recipes.recipe', verbose_name='Рецепт')),
+                ('score', models.FloatField(verbose_name='Популярность')),
+            ],
+            options={
+                'verbose_name': 'Популярность рецепта',
+                'verbose_name_plural': 'Популярность рецептов',
+            },
+        ),
+        migrations.CreateModel(
+            name='TrendWatermark',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=32, unique=True, verbose_name='Источник')),
+                ('last_id', models.PositiveBigIntegerField(default=0, verbose_name='Последний обработанный id')),
+                ('computed_at', models.DateTimeField(null=True, verbose_name='Время пересчета')),
+            ],
+            options={
+                'verbose_name': 'Отметка пересчета популярности',
+                'verbose_name_plural': 'Отметки пересчета популярности',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='recipetrend',
+            index=models.Index(fields=['-score', '-recipe'], name='recipe_trend_score_idx'),
+        ),
+    ]
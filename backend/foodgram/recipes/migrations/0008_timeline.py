@@ -0,0 +1,78 @@
+# Generated by Django 3.2.15 on 2026-10-18 16:58
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+FILL_TIMELINES = """
+    INSERT INTO recipes_timelineentry (user_id, author_id, recipe_id)
+    SELECT follow.follower_id, recipe.author_id, recipe.id
+    FROM (
+        SELECT id, author_id, ROW_NUMBER() OVER (
+            PARTITION BY author_id ORDER BY id DESC
+        ) AS position
+        FROM recipes_recipe
+    ) recipe
+    JOIN recipes_follow follow ON follow.author_id = recipe.author_id
+    JOIN recipes_userstats stats ON stats.user_id = recipe.author_id
+    WHERE recipe.position <= %s AND stats.followers_count <= %s
+"""
+
+
+def fill_timelines(apps, schema_editor):
+    schema_editor.execute(FILL_TIMELINES, (
+        settings.FEED_BACKFILL_LIMIT, settings.FEED_FANOUT_LIMIT
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0007_recipe_trends'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+            options={
+                'verbose_name': 'Запись ленты',
+                'verbose_name_plural': 'Записи лент',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['author', '-id'], name='recipe_author_id_idx'),
+        ),
+        migrations.AddField(
+            model_name='timelineentry',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор'),
+        ),
+        migrations.AddField(
+            model_name='timelineentry',
+            name='recipe',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='recipes.recipe', verbose_name='Рецепт'),
+        ),
+        migrations.AddField(
+            model_name='timelineentry',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to=settings.AUTH_USER_MODEL, verbose_name='Подписчик'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', '-recipe'], name='timeline_user_recipe_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', 'author'], name='timeline_user_author_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='timelineentry',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_timeline_entry'),
+        ),
+        migrations.RunPython(fill_timelines, migrations.RunPython.noop),
+    ]
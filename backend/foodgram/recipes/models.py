@@ -1,9 +1,23 @@
+import uuid
+
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import Greatest
 
 User = get_user_model()
 
 
+class CounterQuerySet(models.QuerySet):
+    def increment(self, field, delta=1):
+        # Строки могли создаваться в обход API (админка, loaddata), поэтому
+        # счетчик может отставать и не должен уходить в минус.
+        return self.update(**{field: Greatest(
+            F(field) + delta, 0, output_field=models.IntegerField()
+        )})
+
+
 class Follow(models.Model):
     follower = models.ForeignKey(
         User,
@@ -31,6 +45,33 @@ class Follow(models.Model):
         return f'{self.follower} {self.author}'
 
 
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    recipes_count = models.PositiveIntegerField(
+        verbose_name='Количество рецептов',
+        default=0
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Количество подписчиков',
+        default=0
+    )
+
+    objects = CounterQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Счетчики пользователя'
+        verbose_name_plural = 'Счетчики пользователей'
+
+    def __str__(self):
+        return f'{self.user} {self.recipes_count} {self.followers_count}'
+
+
 class Ingredient(models.Model):
     name = models.CharField(
         max_length=200,
@@ -108,6 +149,12 @@ class Recipe(models.Model):
         upload_to='recipes/',
         help_text='Загрузите изображение с вашего компьютера',
     )
+    image_variants = models.JSONField(
+        verbose_name='Уменьшенные копии картинки',
+        default=dict,
+        blank=True,
+        editable=False
+    )
     text = models.TextField(
         verbose_name='Текстовое описание',
         help_text='Добавьте текстовое описание'
@@ -115,11 +162,33 @@ class Recipe(models.Model):
     cooking_time = models.PositiveSmallIntegerField(
         verbose_name='Время приготовления в минутах'
     )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='Добавлений в избранное',
+        default=0,
+        editable=False
+    )
+    in_carts_count = models.PositiveIntegerField(
+        verbose_name='Добавлений в корзину',
+        default=0,
+        editable=False
+    )
+
+    objects = CounterQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ['-id']
+        indexes = [
+            models.Index(
+                fields=['-favorites_count', '-id'],
+                name='recipe_favorites_count_idx'
+            ),
+            models.Index(
+                fields=['author', '-id'],
+                name='recipe_author_id_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -180,6 +249,53 @@ class IngredientRecipe(models.Model):
         return f'{self.ingredient} {self.amount}'
 
 
+class RecipeSearchTerm(models.Model):
+    recipe = models.ForeignKey(
+        Recipe,
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE,
+        related_name='search_terms'
+    )
+    term = models.CharField(
+        max_length=64,
+        verbose_name='Терм'
+    )
+    weight = models.PositiveIntegerField(
+        verbose_name='Вес'
+    )
+
+    class Meta:
+        verbose_name = 'Терм поискового индекса'
+        verbose_name_plural = 'Термы поискового индекса'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['term', 'recipe'],
+                name='unique_search_term'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.term} {self.recipe}'
+
+
+class RecipeSearchVector(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_vector'
+    )
+    vector = SearchVectorField(null=True)
+
+    class Meta:
+        verbose_name = 'Поисковый вектор рецепта'
+        verbose_name_plural = 'Поисковые векторы рецептов'
+
+    def __str__(self):
+        return f'{self.recipe}'
+
+
 class Favorite(models.Model):
     user = models.ForeignKey(
         User,
@@ -234,3 +350,183 @@ class ShoppingCart(models.Model):
 
     def __str__(self):
         return f'{self.user} {self.recipe}'
+
+
+class ShoppingListItemQuerySet(models.QuerySet):
+    def refresh(self, users, ingredients=None):
+        with transaction.atomic():
+            list(User.objects.select_for_update().filter(
+                id__in=users
+            ).values_list('id', flat=True))
+            totals = IngredientRecipe.objects.filter(
+                recipe__shopping_cart__user__in=users
+            )
+            items = self.filter(user__in=users)
+            if ingredients is not None:
+                totals = totals.filter(ingredient__in=ingredients)
+                items = items.filter(ingredient__in=ingredients)
+            totals = totals.values_list(
+                'recipe__shopping_cart__user', 'ingredient'
+            ).annotate(Sum('amount')).order_by()
+            items.delete()
+            self.bulk_create(
+                ShoppingListItem(
+                    user_id=user,
+                    ingredient_id=ingredient,
+                    total_amount=total_amount
+                ) for user, ingredient, total_amount in totals
+            )
+
+
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+        related_name='shopping_list'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        verbose_name='Ингредиент',
+        on_delete=models.CASCADE,
+    )
+    total_amount = models.PositiveIntegerField(
+        verbose_name='Количество'
+    )
+
+    objects = ShoppingListItemQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Позиция списка покупок'
+        verbose_name_plural = 'Позиции списков покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_shopping_list_item'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user} {self.ingredient} {self.total_amount}'
+
+
+class ImageUpload(models.Model):
+    token = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False
+    )
+    user = models.ForeignKey(
+        User,
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+        related_name='image_uploads'
+    )
+    image = models.ImageField(
+        verbose_name='Картинка',
+        upload_to='recipes/'
+    )
+    created = models.DateTimeField(
+        verbose_name='Загружено',
+        auto_now_add=True
+    )
+
+    class Meta:
+        verbose_name = 'Загруженная картинка'
+        verbose_name_plural = 'Загруженные картинки'
+
+    def __str__(self):
+        return f'{self.user} {self.image}'
+
+
+class RecipeTrend(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trend'
+    )
+    score = models.FloatField(
+        verbose_name='Популярность'
+    )
+
+    class Meta:
+        verbose_name = 'Популярность рецепта'
+        verbose_name_plural = 'Популярность рецептов'
+        indexes = [
+            models.Index(
+                fields=['-score', '-recipe'],
+                name='recipe_trend_score_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} {self.score}'
+
+
+class TrendWatermark(models.Model):
+    source = models.CharField(
+        max_length=32,
+        verbose_name='Источник',
+        unique=True
+    )
+    last_id = models.PositiveBigIntegerField(
+        verbose_name='Последний обработанный id',
+        default=0
+    )
+    computed_at = models.DateTimeField(
+        verbose_name='Время пересчета',
+        null=True
+    )
+
+    class Meta:
+        verbose_name = 'Отметка пересчета популярности'
+        verbose_name_plural = 'Отметки пересчета популярности'
+
+    def __str__(self):
+        return f'{self.source} {self.last_id}'
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        verbose_name='Подписчик',
+        on_delete=models.CASCADE,
+        related_name='timeline'
+    )
+    author = models.ForeignKey(
+        User,
+        verbose_name='Автор',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE,
+        related_name='timeline_entries'
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи лент'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_timeline_entry'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-recipe'],
+                name='timeline_user_recipe_idx'
+            ),
+            models.Index(
+                fields=['user', 'author'],
+                name='timeline_user_author_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user} {self.recipe}'
@@ -0,0 +1,271 @@
+import re
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector
+)
+from django.db import connection, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+
+from .models import (
+    IngredientRecipe, Recipe, RecipeSearchTerm, RecipeSearchVector
+)
+
+NAME_WEIGHT = 3
+INGREDIENT_WEIGHT = 2
+TEXT_WEIGHT = 1
+
+VOWELS = 'аеиоуыэюя'
+STOP_WORDS = frozenset((
+    'а', 'без', 'в', 'во', 'для', 'до', 'же', 'за', 'и', 'из', 'или',
+    'к', 'как', 'ко', 'на', 'не', 'но', 'о', 'об', 'от', 'по', 'под',
+    'при', 'с', 'со', 'то', 'у', 'это',
+))
+WORD_RE = re.compile(r'\w+')
+
+
+def _suffixes(groups):
+    return sorted(
+        ((ending, preceded) for preceded, group in zip((True, False), groups)
+         for ending in group),
+        key=lambda item: -len(item[0])
+    )
+
+
+PERFECTIVE_GERUND = _suffixes((
+    ('вшись', 'вши', 'в'),
+    ('ывшись', 'ившись', 'ывши', 'ивши', 'ыв', 'ив'),
+))
+ADJECTIVE = _suffixes((
+    (),
+    ('ими', 'ыми', 'его', 'ого', 'ему', 'ому', 'ее', 'ие', 'ые', 'ое',
+     'ей', 'ий', 'ый', 'ой', 'ем', 'им', 'ым', 'ом', 'их', 'ых', 'ую',
+     'юю', 'ая', 'яя', 'ою', 'ею'),
+))
+PARTICIPLE = _suffixes((
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+))
+REFLEXIVE = _suffixes(((), ('ся', 'сь')))
+VERB = _suffixes((
+    ('ете', 'йте', 'ешь', 'нно', 'ла', 'на', 'ли', 'ем', 'ло', 'но',
+     'ет', 'ют', 'ны', 'ть', 'й', 'л', 'н'),
+    ('уйте', 'ейте', 'ила', 'ыла', 'ена', 'ите', 'или', 'ыли', 'ило',
+     'ыло', 'ено', 'ует', 'уют', 'ены', 'ить', 'ыть', 'ишь', 'ей', 'уй',
+     'ил', 'ыл', 'им', 'ым', 'ен', 'ят', 'ит', 'ыт', 'ую', 'ю'),
+))
+NOUN = _suffixes((
+    (),
+    ('иями', 'ями', 'ами', 'ией', 'иям', 'ием', 'иях', 'ев', 'ов', 'ие',
+     'ье', 'еи', 'ии', 'ей', 'ой', 'ий', 'ям', 'ем', 'ам', 'ом', 'ах',
+     'ях', 'ию', 'ью', 'ия', 'ья', 'а', 'е', 'и', 'й', 'о', 'у', 'ы',
+     'ь', 'ю', 'я'),
+))
+SUPERLATIVE = _suffixes(((), ('ейше', 'ейш')))
+DERIVATIONAL = _suffixes(((), ('ость', 'ост')))
+
+
+def normalize(value):
+    return value.casefold().replace('ё', 'е')
+
+
+def _region(word, start):
+    for i in range(start + 1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            return i + 1
+    return len(word)
+
+
+def _strip(word, start, suffixes):
+    for ending, preceded in suffixes:
+        stem = word[:-len(ending)]
+        if not word.endswith(ending) or len(stem) < start:
+            continue
+        if preceded and (len(stem) <= start or stem[-1] not in 'ая'):
+            continue
+        return stem
+    return None
+
+
+def _undouble(word, rv):
+    if word.endswith('нн') and len(word) - 1 >= rv:
+        return word[:-1]
+    return word
+
+
+# Словарь рецептов невелик, а индексация стеммит каждое слово каждого текста.
+@lru_cache(maxsize=100000)
+def stem(word):
+    """Стеммер Snowball для русского языка."""
+    rv = next(
+        (i + 1 for i, letter in enumerate(word) if letter in VOWELS),
+        len(word)
+    )
+    r2 = _region(word, _region(word, 0))
+    stemmed = _strip(word, rv, PERFECTIVE_GERUND)
+    if stemmed is None:
+        word = _strip(word, rv, REFLEXIVE) or word
+        adjective = _strip(word, rv, ADJECTIVE)
+        if adjective is not None:
+            stemmed = _strip(adjective, rv, PARTICIPLE) or adjective
+        else:
+            stemmed = _strip(word, rv, VERB) or _strip(word, rv, NOUN)
+    word = stemmed if stemmed is not None else word
+    if word.endswith('и') and len(word) - 1 >= rv:
+        word = word[:-1]
+    word = _strip(word, r2, DERIVATIONAL) or word
+    superlative = _strip(word, rv, SUPERLATIVE)
+    if superlative is not None:
+        return _undouble(superlative, rv)
+    if word.endswith('нн'):
+        return _undouble(word, rv)
+    if word.endswith('ь') and len(word) - 1 >= rv:
+        return word[:-1]
+    return word
+
+
+def tokenize(text):
+    return [
+        stem(word) for word in WORD_RE.findall(normalize(text))
+        if word not in STOP_WORDS
+    ]
+
+
+def recipe_documents(recipe):
+    return (
+        (recipe.name, NAME_WEIGHT),
+        (' '.join(recipe.ingredients.values_list('name', flat=True)),
+         INGREDIENT_WEIGHT),
+        (recipe.text, TEXT_WEIGHT),
+    )
+
+
+def weigh_terms(documents):
+    """Веса термов: сумма весов полей, в которых встретился терм."""
+    weights = Counter()
+    for text, weight in documents:
+        for term in tokenize(text):
+            weights[term[:64]] += weight
+    return weights
+
+
+# Векторы рецептов с id в полуинтервале (%s, %s] одним запросом, как
+# PostgresSearchBackend.index.
+FILL_SEARCH_VECTORS = """
+    INSERT INTO recipes_recipesearchvector (recipe_id, vector)
+    SELECT recipe.id,
+        setweight(to_tsvector('russian',
+            replace(lower(recipe.name), 'ё', 'е')), 'A')
+        || setweight(to_tsvector('russian',
+            replace(lower(coalesce(string_agg(ingredient.name, ' '), '')),
+                    'ё', 'е')), 'B')
+        || setweight(to_tsvector('russian',
+            replace(lower(recipe.text), 'ё', 'е')), 'C')
+    FROM recipes_recipe recipe
+    LEFT JOIN recipes_ingredientrecipe item ON item.recipe_id = recipe.id
+    LEFT JOIN recipes_ingredient ingredient
+        ON ingredient.id = item.ingredient_id
+    WHERE recipe.id > %s AND recipe.id <= %s
+    GROUP BY recipe.id
+"""
+
+INSERT_SEARCH_TERM = (
+    'INSERT INTO recipes_recipesearchterm (recipe_id, term, weight) '
+    'VALUES (%s, %s, %s)'
+)
+
+
+class TermSearchBackend:
+    """Инвертированный индекс в таблице RecipeSearchTerm."""
+
+    def index(self, recipe):
+        weights = weigh_terms(recipe_documents(recipe))
+        with transaction.atomic():
+            RecipeSearchTerm.objects.filter(recipe=recipe).delete()
+            RecipeSearchTerm.objects.bulk_create(
+                RecipeSearchTerm(recipe=recipe, term=term, weight=weight)
+                for term, weight in weights.items()
+            )
+
+    def index_range(self, start, end):
+        """Переиндексирует рецепты с id в (start, end] пачкой запросов.
+
+        Термы вставляются через executemany без создания моделей: при
+        полной переиндексации их миллионы.
+        """
+        ingredients = defaultdict(list)
+        for recipe, name in IngredientRecipe.objects.filter(
+            recipe__gt=start, recipe__lte=end
+        ).values_list('recipe', 'ingredient__name').iterator():
+            ingredients[recipe].append(name)
+        terms = [
+            (recipe, term, weight)
+            for recipe, name, text in Recipe.objects.filter(
+                id__gt=start, id__lte=end
+            ).values_list('id', 'name', 'text').iterator()
+            for term, weight in weigh_terms((
+                (name, NAME_WEIGHT),
+                (' '.join(ingredients[recipe]), INGREDIENT_WEIGHT),
+                (text, TEXT_WEIGHT),
+            )).items()
+        ]
+        with transaction.atomic():
+            RecipeSearchTerm.objects.filter(
+                recipe__gt=start, recipe__lte=end
+            ).delete()
+            with connection.cursor() as cursor:
+                cursor.executemany(INSERT_SEARCH_TERM, terms)
+
+    def search(self, queryset, query):
+        terms = set(tokenize(query))
+        if not terms:
+            return queryset.none()
+        rank = RecipeSearchTerm.objects.filter(
+            recipe=OuterRef('pk'),
+            term__in=terms
+        ).values('recipe').annotate(
+            rank=Count('id') * 1000 + Sum('weight')
+        ).values('rank')
+        return queryset.annotate(
+            search_rank=Subquery(rank)
+        ).filter(search_rank__isnull=False).order_by('-search_rank', '-id')
+
+
+class PostgresSearchBackend:
+    """Взвешенный tsvector с GIN-индексом в таблице RecipeSearchVector."""
+
+    config = 'russian'
+
+    def index(self, recipe):
+        vector = None
+        for (text, _), weight in zip(recipe_documents(recipe), 'ABC'):
+            part = SearchVector(
+                Value(normalize(text)), weight=weight, config=self.config
+            )
+            vector = part if vector is None else vector + part
+        RecipeSearchVector.objects.update_or_create(
+            recipe=recipe,
+            defaults={'vector': vector}
+        )
+
+    def index_range(self, start, end):
+        """Переиндексирует рецепты с id в (start, end] одним INSERT."""
+        with transaction.atomic():
+            RecipeSearchVector.objects.filter(
+                recipe__gt=start, recipe__lte=end
+            ).delete()
+            with connection.cursor() as cursor:
+                cursor.execute(FILL_SEARCH_VECTORS, [start, end])
+
+    def search(self, queryset, query):
+        query = SearchQuery(normalize(query), config=self.config)
+        return queryset.filter(search_vector__vector=query).annotate(
+            search_rank=SearchRank(F('search_vector__vector'), query)
+        ).order_by('-search_rank', '-id')
+
+
+def get_search_backend():
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    return TermSearchBackend()
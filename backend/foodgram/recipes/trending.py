@@ -0,0 +1,81 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Max
+from django.utils import timezone
+
+from .models import Favorite, RecipeTrend, ShoppingCart, TrendWatermark
+
+HALF_LIFE = timedelta(days=1)
+MIN_SCORE = 0.01
+SOURCES = (
+    ('favorite', Favorite, 2.0),
+    ('shopping_cart', ShoppingCart, 1.0),
+)
+
+
+def collect_new_activity(watermark, model, weight, batch_size):
+    """Суммирует добавления рецептов после отметки, сдвигая отметку."""
+    activity = Counter()
+    last_id = model.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+    for start in range(watermark.last_id, last_id, batch_size):
+        rows = model.objects.filter(
+            id__gt=start, id__lte=min(start + batch_size, last_id)
+        ).values('recipe').annotate(count=Count('id')).order_by()
+        for row in rows:
+            activity[row['recipe']] += weight * row['count']
+    watermark.last_id = max(watermark.last_id, last_id)
+    return activity
+
+
+def apply_activity(activity, batch_size):
+    recipe_ids = sorted(activity)
+    for start in range(0, len(recipe_ids), batch_size):
+        batch = recipe_ids[start:start + batch_size]
+        trends = RecipeTrend.objects.in_bulk(batch)
+        for trend in trends.values():
+            trend.score += activity[trend.pk]
+        RecipeTrend.objects.bulk_update(trends.values(), ['score'])
+        RecipeTrend.objects.bulk_create(
+            RecipeTrend(recipe_id=recipe_id, score=activity[recipe_id])
+            for recipe_id in batch if recipe_id not in trends
+        )
+
+
+def update_trends(now=None, half_life=HALF_LIFE, min_score=MIN_SCORE,
+                  batch_size=10000):
+    """Ослабляет накопленные оценки и добавляет активность после отметок.
+
+    Оценка рецепта — сумма добавлений в избранное и корзину, вес каждого
+    из которых уменьшается вдвое за half_life. Рецепты с оценкой ниже
+    min_score выпадают из таблицы, что заменяет скользящее окно.
+    """
+    now = now or timezone.now()
+    for source, _, _ in SOURCES:
+        TrendWatermark.objects.get_or_create(source=source)
+    with transaction.atomic():
+        watermarks = {
+            watermark.source: watermark
+            for watermark in TrendWatermark.objects.select_for_update()
+        }
+        computed_at = min(
+            (watermark.computed_at for watermark in watermarks.values()
+             if watermark.computed_at is not None),
+            default=None
+        )
+        if computed_at is not None and now > computed_at:
+            decay = 0.5 ** ((now - computed_at) / half_life)
+            RecipeTrend.objects.update(score=F('score') * decay)
+        activity = Counter()
+        for source, model, weight in SOURCES:
+            activity.update(collect_new_activity(
+                watermarks[source], model, weight, batch_size
+            ))
+            watermarks[source].computed_at = now
+        apply_activity(activity, batch_size)
+        RecipeTrend.objects.filter(score__lt=min_score).delete()
+        TrendWatermark.objects.bulk_update(
+            watermarks.values(), ['last_id', 'computed_at']
+        )
+    return len(activity)